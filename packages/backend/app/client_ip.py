@@ -0,0 +1,40 @@
+from functools import lru_cache
+from ipaddress import ip_address, ip_network
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# sadece bu adreslerden gelen X-Real-IP / X-Forwarded-For'a guveniyoruz,
+# yoksa client header'i degistirip her istekte yeni bi ip bucket'i alir
+TRUSTED_PROXIES = [
+    ip_network(value.strip(), strict=False)
+    for value in settings.trusted_proxies.split(",")
+    if value.strip()
+]
+
+
+@lru_cache(maxsize=1024)
+def is_trusted_proxy(ip: str) -> bool:
+    try:
+        address = ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def resolve_client_ip(peer: str | None, real_ip: str | None, forwarded_for: str | None) -> str:
+    # peer: tcp baglantisinin karsi ucu, header'lar ancak o guvenilir proxy ise okunuyo
+    if not peer:
+        return "unknown"
+    if not is_trusted_proxy(peer):
+        return peer
+    if real_ip and real_ip.strip():
+        return real_ip.strip()
+    if forwarded_for:
+        # sagdan ilk guvenilmeyen adres, soldakileri client kendisi yazmis olabilir
+        for candidate in reversed(forwarded_for.split(",")):
+            candidate = candidate.strip()
+            if candidate and not is_trusted_proxy(candidate):
+                return candidate
+    return peer
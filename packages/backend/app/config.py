@@ -10,8 +10,25 @@ class Settings(BaseSettings):
     postgres_db: str = "taskdb"
     postgres_user: str = "taskuser"
     postgres_password: str = "taskpass"
+    # connection pool, worker basina
+    postgres_pool_size: int = 10
+    postgres_max_overflow: int = 10
+    postgres_pool_timeout: float = 5.0  # sn, bos connection beklerken
+    postgres_pool_recycle: int = 1800  # sn
+    # her checkout'ta ekstra SELECT 1, recycle varken genelde gerek yok
+    postgres_pool_pre_ping: bool = False
+    postgres_statement_cache_size: int = 500  # asyncpg prepared statement, 0 = kapali
 
     mongodb_uri: str = "mongodb://localhost:27017/taskdb"
+    mongodb_max_pool_size: int = 100
+    mongodb_min_pool_size: int = 10
+    mongodb_server_selection_timeout_ms: int = 5000
+    # yuklu olmayanlar atlaniyo (zstd -> zstandard, snappy -> python-snappy)
+    mongodb_compressors: str = "zstd,snappy,zlib"
+    # GET /tasks sayfali okumalari icin
+    mongodb_list_read_preference: str = "secondaryPreferred"
+    mongodb_slow_query_ms: int = 100
+    mongodb_batch_size: int = 1000  # buyuk listeleri okurken cursor batch'i
 
     redis_host: str = "localhost"
     redis_port: int = 6379
@@ -21,7 +38,104 @@ class Settings(BaseSettings):
     jwt_expires_in: str = "7d"
     jwt_algorithm: str = "HS256"
 
+    # true ise task route'lari postgres'e hic gitmez, token claim'lerine guvenir
+    auth_stateless: bool = False
+    auth_user_cache_size: int = 10000
+    auth_user_cache_ttl: int = 30  # sn
+    auth_token_cache_size: int = 10000
+
+    # bcrypt thread pool, dolunca 503 + Retry-After
+    bcrypt_workers: int = 4
+    bcrypt_max_queue: int = 64
+
+    # auto: orjson > msgspec > stdlib json
+    json_backend: str = "auto"
+
+    # socket.io: birden fazla worker/node icin redis manager + baglanti registry'si
+    ws_cluster_mode: bool = False
+    ws_registry_ttl: int = 60  # sn, heartbeat gelmezse socket olu sayilir
+    ws_heartbeat_interval: int = 20
+    # event pipeline: ilk event'ten sonra bu kadar bekle ya da bu kadar event birikince gonder
+    ws_flush_interval_ms: int = 50
+    ws_flush_max_events: int = 100
+    ws_queue_max: int = 10000
+    # socket basina gonderim kuyrugu limiti, asilinca: drop_oldest | disconnect
+    ws_send_buffer_max: int = 100
+    ws_slow_consumer_policy: str = "drop_oldest"
+    # kacirilan event'ler icin user basina redis stream
+    ws_event_retention: int = 1000  # event sayisi (yaklasik)
+    ws_event_ttl: int = 86400  # sn
+    ws_resume_max: int = 500  # daha gerideyse tam liste cekilsin
+    # connect rate limit, pencere basina
+    ws_connect_window: int = 10  # sn
+    ws_connect_max_per_user: int = 20
+    ws_connect_max_per_ip: int = 100
+
     cache_ttl: int = 300  # 5 dk
+    cache_ttl_jitter: float = 0.1  # ttl +-%10
+    cache_stale_ttl: int = 60  # ttl bittikten sonra eski veri verilebilecek sure, 0 = kapali
+    cache_lock_ttl_ms: int = 5000
+    cache_lock_wait_ms: int = 2000
+    cache_rebuild_chunk_size: int = 500  # rebuild'de redis'e tek seferde yazilan task
+    # GET /tasks body'si redis'te gzip'li saklanir, client gzip kabul ediyosa direkt gonderilir
+    cache_body_compression: bool = True
+
+    # L1: her worker'da redis'in onunde LRU, pub/sub ile invalidate ediliyo
+    l1_cache_enabled: bool = False
+    l1_cache_max_entries: int = 1000
+    l1_cache_max_bytes: int = 64 * 1024 * 1024
+    l1_cache_ttl: float = 5.0  # sn
+
+    # GET /tasks pagination
+    task_page_size: int = 100
+    task_page_max: int = 1000
+
+    # /tasks/search
+    search_page_size: int = 20
+    search_min_term_length: int = 2
+    search_max_terms: int = 200  # dokuman basina index'e giren kelime
+    search_max_query_terms: int = 8
+    search_backfill_batch_size: int = 500
+    search_backfill_lock_ttl: int = 60  # sn, her batch'te uzatiliyo
+
+    # /tasks/bulk tek istekte en fazla
+    bulk_max_items: int = 1000
+
+    # /tasks/import: mongo'ya kacar kacar yazilsin, response'ta en fazla kac satir hatasi
+    import_batch_size: int = 1000
+    import_max_errors: int = 100
+    # satir (csv'de tirnakli kayit) ve acilmis body icin ust sinir
+    import_max_line_length: int = 64 * 1024  # karakter
+    import_max_body_bytes: int = 256 * 1024 * 1024
+
+    # /health ve /readyz: her probe icin timeout, sonuc kisa sure cache'leniyo
+    health_probe_timeout: float = 2.0  # sn
+    health_cache_ttl: float = 5.0  # sn
+
+    # X-Real-IP / X-Forwarded-For sadece bu adreslerden (virgulle ip ya da cidr) gelince okunuyo
+    trusted_proxies: str = "127.0.0.1,::1"
+
+    # rate limit: redis'te token bucket, "METHOD /route/template=istek/sn[:ip|user]"
+    # key_by yoksa token'li istekte user, degilse ip; listede olmayan route'lar default'u paylasiyo
+    rate_limit_enabled: bool = True
+    rate_limits: str = (
+        "POST /auth/login=10/60:ip,"
+        "POST /auth/register=5/60:ip,"
+        "GET /tasks=120/60,"
+        "GET /tasks/search=120/60,"
+        "GET /tasks/export=10/60,"
+        "POST /tasks/import=10/60"
+    )
+    rate_limit_default: str = "600/60"
+    rate_limit_local_cache_size: int = 10000  # reddedilen key'ler, Retry-After dolana kadar redis'e sorulmuyo
+    # event loop bu kadar geride kalinca yeni istekler 503, 0 = kapali
+    loop_lag_shed_ms: float = 200
+    loop_lag_interval_ms: int = 100
+
+    # /tasks/stats: redis sayaclari, yoksa mongo aggregation ile yeniden kuruluyo
+    stats_ttl: int = 86400  # sn, dolunca mongo'dan tamir
+    stats_default_days: int = 30
+    stats_max_days: int = 90
 
     @property
     def postgres_url(self) -> str:
@@ -1,11 +1,18 @@
+import importlib.util
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from beanie import init_beanie
 import redis.asyncio as redis
 from typing import AsyncGenerator
 
 from app.config import get_settings
+from app.metrics import mongodb_command_seconds, postgres_query_seconds, bound
 
 settings = get_settings()
 
@@ -15,12 +22,53 @@ class Base(DeclarativeBase):
 
 
 # postgres
+postgres_pool_stats = {
+    "checkouts": 0,
+    "timeouts": 0,
+    "wait_avg_ms": 0.0,
+    "wait_max_ms": 0.0
+}
+
+
+class MeasuredPool(AsyncAdaptedQueuePool):
+    # connection alana kadar ne kadar beklendi
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            postgres_pool_stats["timeouts"] += 1
+            raise
+        finally:
+            waited_ms = (time.perf_counter() - started) * 1000
+            postgres_pool_stats["checkouts"] += 1
+            # ewma
+            postgres_pool_stats["wait_avg_ms"] += 0.1 * (waited_ms - postgres_pool_stats["wait_avg_ms"])
+            postgres_pool_stats["wait_max_ms"] = max(postgres_pool_stats["wait_max_ms"], waited_ms)
+
+
 engine = create_async_engine(
     settings.postgres_url,
     echo=False,
-    pool_pre_ping=True,
+    poolclass=MeasuredPool,
+    pool_size=settings.postgres_pool_size,
+    max_overflow=settings.postgres_max_overflow,
+    pool_timeout=settings.postgres_pool_timeout,
+    pool_recycle=settings.postgres_pool_recycle,
+    pool_pre_ping=settings.postgres_pool_pre_ping,
+    connect_args={"prepared_statement_cache_size": settings.postgres_statement_cache_size},
 )
 
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    postgres_query_seconds.observe(time.perf_counter() - context._query_started)
+
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -36,6 +84,21 @@ async def get_postgres_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+def get_postgres_pool_stats() -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": settings.postgres_max_overflow,
+        "checkouts": postgres_pool_stats["checkouts"],
+        "timeouts": postgres_pool_stats["timeouts"],
+        "wait_avg_ms": round(postgres_pool_stats["wait_avg_ms"], 3),
+        "wait_max_ms": round(postgres_pool_stats["wait_max_ms"], 3)
+    }
+
+
 async def init_postgres():
     from app.models.user import User  # noqa
     async with engine.begin() as conn:
@@ -45,12 +108,134 @@ async def init_postgres():
 # mongodb
 mongodb_client: AsyncIOMotorClient = None
 
+# compressor -> gereken python modulu
+MONGODB_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+# command adi -> sayaclar
+mongodb_command_stats: dict[str, dict] = {}
+mongodb_pool_stats = {
+    "checked_out": 0,
+    "checkouts": 0,
+    "checkout_failed": 0,
+    "wait_avg_ms": 0.0,
+    "wait_max_ms": 0.0
+}
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    # pymongo her command icin cagiriyo, hizli olmasi lazim
+    def __init__(self):
+        # request_id -> (command, collection), yavas sorguyu loglarken lazim
+        self._pending: dict[int, tuple[str, str]] = {}
+
+    def started(self, event):
+        self._pending[event.request_id] = (event.command_name, str(event.command.get(event.command_name, "")))
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed: bool) -> None:
+        _, collection = self._pending.pop(event.request_id, (event.command_name, ""))
+        elapsed_ms = event.duration_micros / 1000
+
+        stats = mongodb_command_stats.get(event.command_name)
+        if stats is None:
+            stats = mongodb_command_stats[event.command_name] = {
+                "count": 0, "failed": 0, "slow": 0, "avg_ms": 0.0, "max_ms": 0.0
+            }
+        bound(mongodb_command_seconds, event.command_name).observe(elapsed_ms / 1000)
+        stats["count"] += 1
+        # ewma
+        stats["avg_ms"] += 0.1 * (elapsed_ms - stats["avg_ms"])
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if failed:
+            stats["failed"] += 1
+
+        if elapsed_ms >= settings.mongodb_slow_query_ms:
+            stats["slow"] += 1
+            print(f"[Mongo] Slow {event.command_name} on {event.database_name}.{collection}: {elapsed_ms:.1f}ms")
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    # pool dolmaya basladiginda checkout beklemesi artiyo
+    def connection_checked_out(self, event):
+        mongodb_pool_stats["checked_out"] += 1
+        mongodb_pool_stats["checkouts"] += 1
+        waited_ms = (event.duration or 0) * 1000
+        mongodb_pool_stats["wait_avg_ms"] += 0.1 * (waited_ms - mongodb_pool_stats["wait_avg_ms"])
+        mongodb_pool_stats["wait_max_ms"] = max(mongodb_pool_stats["wait_max_ms"], waited_ms)
+
+    def connection_checked_in(self, event):
+        mongodb_pool_stats["checked_out"] -= 1
+
+    def connection_check_out_failed(self, event):
+        mongodb_pool_stats["checkout_failed"] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+def get_mongodb_compressors() -> list[str]:
+    # kurulu olmayan kutuphane icin pymongo her seferinde uyari basiyo, biz eleyelim
+    compressors = [name.strip() for name in settings.mongodb_compressors.split(",") if name.strip()]
+    return [
+        name for name in compressors
+        if name in MONGODB_COMPRESSOR_MODULES
+        and importlib.util.find_spec(MONGODB_COMPRESSOR_MODULES[name]) is not None
+    ]
+
+
+def get_mongodb_stats() -> dict:
+    return {
+        "pool": {
+            **mongodb_pool_stats,
+            "max_pool_size": settings.mongodb_max_pool_size,
+            "wait_avg_ms": round(mongodb_pool_stats["wait_avg_ms"], 3),
+            "wait_max_ms": round(mongodb_pool_stats["wait_max_ms"], 3)
+        },
+        "commands": {
+            name: {**stats, "avg_ms": round(stats["avg_ms"], 3), "max_ms": round(stats["max_ms"], 3)}
+            for name, stats in mongodb_command_stats.items()
+        }
+    }
+
 
 async def init_mongodb():
     global mongodb_client
     from app.models.task import Task  # noqa
     
-    mongodb_client = AsyncIOMotorClient(settings.mongodb_uri)
+    mongodb_client = AsyncIOMotorClient(
+        settings.mongodb_uri,
+        maxPoolSize=settings.mongodb_max_pool_size,
+        minPoolSize=settings.mongodb_min_pool_size,
+        serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms,
+        compressors=get_mongodb_compressors(),
+        event_listeners=[CommandStatsListener(), PoolStatsListener()]
+    )
     database = mongodb_client.get_default_database()
     
     await init_beanie(
@@ -67,34 +252,48 @@ async def close_mongodb():
 
 # redis
 redis_client: redis.Redis = None
+# hazir response body'leri (gzip) icin, decode etmeyen client
+redis_binary_client: redis.Redis = None
 
 
 async def init_redis():
-    global redis_client
+    global redis_client, redis_binary_client
     redis_client = redis.Redis(
         host=settings.redis_host,
         port=settings.redis_port,
         decode_responses=True
     )
+    redis_binary_client = redis.Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        decode_responses=False
+    )
     await redis_client.ping()
 
 
 async def close_redis():
-    global redis_client
+    global redis_client, redis_binary_client
     if redis_client:
         await redis_client.close()
+    if redis_binary_client:
+        await redis_binary_client.close()
 
 
 def get_redis() -> redis.Redis:
     return redis_client
 
 
+def get_redis_binary() -> redis.Redis:
+    return redis_binary_client
+
+
 # health checks
 async def check_postgres() -> str:
     try:
         from sqlalchemy import text
-        async with AsyncSessionLocal() as session:
-            await session.execute(text("SELECT 1"))
+        # session kurmadan pool'dan bi connection yeterli
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         return "connected"
     except Exception:
         return "disconnected"
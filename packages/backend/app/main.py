@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import socketio
 
@@ -9,14 +9,28 @@ from app.database import (
     init_redis,
     close_mongodb,
     close_redis,
-    check_postgres,
-    check_mongodb,
-    check_redis
+    get_postgres_pool_stats,
+    get_mongodb_stats
 )
 from app.routes.auth import router as auth_router
 from app.routes.tasks import router as tasks_router
-from app.services.websocket_service import sio
-from app.schemas import HealthResponse
+from app.services.websocket_service import (
+    sio,
+    start_ws_registry,
+    stop_ws_registry,
+    start_event_pipeline,
+    stop_event_pipeline,
+    get_ws_stats
+)
+from app.services.pubsub_service import start_pubsub, stop_pubsub
+from app.services.auth_service import get_password_pool_stats, password_executor
+from app.services.cache_service import get_cache_stats
+from app.services.search_service import start_search_backfill, stop_search_backfill
+from app.services.health_service import get_health_checks, is_healthy
+from app.schemas import HealthResponse, ReadinessResponse
+from app.serialization import JSONResponse
+from app.metrics import MetricsMiddleware, render_metrics, mark_process_dead
+from app.rate_limit import RateLimitMiddleware, start_lag_monitor, stop_lag_monitor, get_rate_limit_stats
 
 
 @asynccontextmanager
@@ -26,23 +40,39 @@ async def lifespan(app: FastAPI):
     await init_postgres()
     await init_mongodb()
     await init_redis()
+    await start_pubsub()
+    await start_ws_registry()
+    await start_event_pipeline()
+    await start_lag_monitor()
+    await start_search_backfill()
     
     print("All services ready")
     
     yield
     
     print("Shutting down...")
+    await stop_search_backfill()
+    await stop_lag_monitor()
+    await stop_event_pipeline()
+    await stop_ws_registry()
+    await stop_pubsub()
+    password_executor.shutdown(wait=False)
     await close_mongodb()
     await close_redis()
+    mark_process_dead()
 
 
 app = FastAPI(
     title="Task Management API",
     description="Task management with real-time updates",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=JSONResponse
 )
 
+# en icte: 429/503'ler de CORS header'i alsin, metrics de saysin
+app.add_middleware(RateLimitMiddleware, router=app.router)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -51,29 +81,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth_router)
 app.include_router(tasks_router)
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
-    postgres_status = await check_postgres()
-    mongodb_status = await check_mongodb()
-    redis_status = await check_redis()
-    
-    all_healthy = all(
-        status == "connected" 
-        for status in [postgres_status, mongodb_status, redis_status]
-    )
+    checks = await get_health_checks()
     
     return HealthResponse(
-        status="healthy" if all_healthy else "unhealthy",
-        postgres=postgres_status,
-        mongodb=mongodb_status,
-        redis=redis_status
+        status="healthy" if is_healthy(checks) else "unhealthy",
+        postgres=checks["postgres"]["status"],
+        mongodb=checks["mongodb"]["status"],
+        redis=checks["redis"]["status"]
     )
 
 
+@app.get("/livez", tags=["Health"])
+async def liveness():
+    # sadece process ve event loop ayakta mi, veritabanina gitmiyo
+    return {"status": "ok"}
+
+
+@app.get("/readyz", response_model=ReadinessResponse, tags=["Health"])
+async def readiness(response: Response):
+    checks = await get_health_checks()
+    ready = is_healthy(checks)
+    
+    if not ready:
+        response.status_code = 503
+    
+    return ReadinessResponse(status="ready" if ready else "not_ready", checks=checks)
+
+
+@app.get("/stats", tags=["Health"])
+async def stats():
+    return {
+        "password_pool": get_password_pool_stats(),
+        "postgres_pool": get_postgres_pool_stats(),
+        "mongodb": get_mongodb_stats(),
+        "cache": get_cache_stats(),
+        "websocket": get_ws_stats(),
+        "rate_limit": get_rate_limit_stats()
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
 socket_app = socketio.ASGIApp(sio, other_asgi_app=app)
 
 
@@ -0,0 +1,134 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+# PROMETHEUS_MULTIPROC_DIR verilmisse her worker degerleri o klasordeki mmap dosyalarina yaziyo,
+# /metrics hangi worker'a duserse dussun hepsinin toplamini donuyo
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# redis/mongo/postgres icin http'den daha ince bucket'lar
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+auth_seconds = Histogram(
+    "auth_dependency_duration_seconds",
+    "Time spent resolving the current user",
+    ["dependency"],
+    buckets=FAST_BUCKETS
+)
+password_seconds = Histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hash/verify time including pool queueing",
+    ["operation"]
+)
+cache_lookups = Counter(
+    "cache_lookups_total",
+    "Task list cache lookups by result",
+    ["path", "result"]
+)
+cache_redis_seconds = Histogram(
+    "cache_redis_duration_seconds",
+    "Redis round trip time for task list cache reads",
+    ["operation"],
+    buckets=FAST_BUCKETS
+)
+mongodb_command_seconds = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency",
+    ["command"],
+    buckets=FAST_BUCKETS
+)
+postgres_query_seconds = Histogram(
+    "postgres_query_duration_seconds",
+    "Postgres statement latency",
+    buckets=FAST_BUCKETS
+)
+socketio_clients = Gauge(
+    "socketio_connected_clients",
+    "Connected Socket.IO clients",
+    multiprocess_mode="livesum"
+)
+socketio_events = Counter(
+    "socketio_events_emitted_total",
+    "Task events queued for Socket.IO delivery",
+    ["type"]
+)
+rate_limit_rejections = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected before reaching a route (limit = 429, shed = 503)",
+    ["route", "reason"]
+)
+event_loop_lag_seconds = Gauge(
+    "event_loop_lag_seconds",
+    "Last measured event loop lag",
+    multiprocess_mode="max"
+)
+
+# .labels() her cagrida lock + dict lookup + tuple yapiyo, hot path'te hazir child kullaniyoruz
+_bound: dict[tuple, object] = {}
+
+
+def bound(metric, *labels):
+    key = (metric, labels)
+    child = _bound.get(key)
+    if child is None:
+        child = _bound[key] = metric.labels(*labels)
+    return child
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    # livesum gauge'lari kapanan worker'i saymasin
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    # BaseHTTPMiddleware her istekte task + stream kuruyo, duz ASGI daha ucuz
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # path degil route template, yoksa her task id ayri seri olur
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            bound(http_request_seconds, scope["method"], path, str(status_code)).observe(
+                time.perf_counter() - started
+            )
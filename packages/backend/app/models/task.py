@@ -1,5 +1,6 @@
 from beanie import Document
 from pydantic import Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from datetime import datetime
 from typing import Literal
 from enum import Enum
@@ -18,10 +19,39 @@ class Task(Document):
     status: TaskStatus = Field(default=TaskStatus.TODO)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # status done'a gectigi an, done'dan cikinca None; gunluk istatistikler icin
+    completed_at: datetime | None = Field(default=None)
+    # her update'te +1, If-Match ile optimistic concurrency icin
+    version: int = Field(default=0)
+    # arama icin kucuk harfli kelimeler, task_service.search_fields ile yaziliyo
+    # search_terms ikisinin birlesimi ve index'li, digerleri skor icin
+    title_terms: list[str] = Field(default_factory=list)
+    description_terms: list[str] = Field(default_factory=list)
+    search_terms: list[str] = Field(default_factory=list)
 
     class Settings:
         name = "tasks"
         use_state_management = True
+        # liste/pagination sorgulari hep user_id ile basliyo
+        indexes = [
+            IndexModel(
+                [("user_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_updated_at"
+            ),
+            IndexModel(
+                [("user_id", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_status_updated_at"
+            ),
+            IndexModel(
+                [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_created_at"
+            ),
+            # multikey: /tasks/search tam kelime ($all) ve ^prefix regex'i bu index'ten okuyo
+            IndexModel(
+                [("user_id", ASCENDING), ("search_terms", ASCENDING)],
+                name="user_search_terms"
+            ),
+        ]
 
     class Config:
         json_schema_extra = {
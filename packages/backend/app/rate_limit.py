@@ -0,0 +1,275 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from starlette.routing import Match
+
+from app.client_ip import resolve_client_ip
+from app.config import get_settings
+from app.database import get_redis
+from app.metrics import rate_limit_rejections, event_loop_lag_seconds, bound
+from app.serialization import dumps
+from app.services.auth_service import decode_access_token_cached
+
+settings = get_settings()
+
+# token bucket: kapasite kadar burst, period boyunca kapasite kadar dolum
+# saat redis'ten (TIME), worker'larin saati kaysa da ayni bucket ayni sonucu veriyo
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local capacity = tonumber(ARGV[1])
+local period_ms = tonumber(ARGV[2])
+local rate = capacity / period_ms
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now_ms
+tokens = math.min(capacity, tokens + math.max(0, now_ms - ts) * rate)
+
+local allowed = 0
+local retry_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_ms = math.ceil((1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now_ms)
+redis.call('PEXPIRE', KEYS[1], period_ms)
+return {allowed, math.floor(tokens), retry_ms}
+"""
+
+# bunlar hep gecsin, yoksa yuk altinda orchestrator pod'u olu sanar
+EXEMPT_PATHS = {"/livez", "/readyz", "/health", "/metrics"}
+
+rate_limit_stats = {"allowed": 0, "limited": 0, "local_denied": 0, "shed": 0, "errors": 0}
+loop_lag = {"current_ms": 0.0, "max_ms": 0.0}
+
+_script = None
+_lag_task: asyncio.Task | None = None
+# redis'in reddettigi key'ler, Retry-After dolana kadar redis'e sormadan reddediliyo
+_denied: OrderedDict[str, float] = OrderedDict()
+
+
+@dataclass(frozen=True)
+class Rule:
+    limit: int
+    period: int  # sn
+    key_by: str | None = None  # "ip" | "user" | None (token varsa user, yoksa ip)
+
+
+def parse_rule(value: str) -> Rule:
+    # "10/60" ya da "10/60:ip"
+    spec, _, key_by = value.partition(":")
+    limit, period = spec.split("/")
+    return Rule(int(limit), int(period), key_by or None)
+
+
+def parse_rules(value: str) -> dict[str, Rule]:
+    # "POST /auth/login=10/60:ip,GET /tasks=120/60"
+    rules = {}
+    for item in value.split(","):
+        if item.strip():
+            route, _, rule = item.rpartition("=")
+            rules[route.strip()] = parse_rule(rule.strip())
+    return rules
+
+
+RULES = parse_rules(settings.rate_limits)
+DEFAULT_RULE = parse_rule(settings.rate_limit_default)
+
+
+def _token_bucket():
+    global _script
+    redis = get_redis()
+    if _script is None or _script.registered_client is not redis:
+        _script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+    return _script
+
+
+def _get_client_ip(scope) -> str:
+    # nginx arkasinda gercek ip X-Real-IP'de, ama sadece nginx'ten geldiyse
+    real_ip = forwarded_for = None
+    for name, value in scope["headers"]:
+        if name == b"x-real-ip":
+            real_ip = value.decode("latin-1")
+        elif name == b"x-forwarded-for":
+            forwarded_for = value.decode("latin-1")
+    client = scope.get("client")
+    return resolve_client_ip(client[0] if client else None, real_ip, forwarded_for)
+
+
+def _get_user_id(scope) -> str | None:
+    # sadece imza + exp, postgres'e gitmiyo; token cache'ten genelde bedava
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            payload = decode_access_token_cached(token)
+            return payload.get("sub") if payload else None
+    return None
+
+
+def _match_route(router, scope):
+    # middleware routing'den once calisiyo, scope["route"] henuz yok
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+def _identity(rule: Rule, scope) -> str:
+    if rule.key_by != "ip":
+        user_id = _get_user_id(scope)
+        if user_id:
+            return f"user:{user_id}"
+    return f"ip:{_get_client_ip(scope)}"
+
+
+def _local_retry_after(key: str) -> float | None:
+    denied_until = _denied.get(key)
+    if denied_until is None:
+        return None
+    remaining = denied_until - time.monotonic()
+    if remaining <= 0:
+        del _denied[key]
+        return None
+    return remaining
+
+
+def _remember_denial(key: str, retry_after: float) -> None:
+    _denied[key] = time.monotonic() + retry_after
+    _denied.move_to_end(key)
+    while len(_denied) > settings.rate_limit_local_cache_size:
+        _denied.popitem(last=False)
+
+
+async def check_rate_limit(key: str, rule: Rule) -> tuple[bool, int, float]:
+    # (gecti mi, kalan token, retry_after sn)
+    retry_after = _local_retry_after(key)
+    if retry_after is not None:
+        rate_limit_stats["local_denied"] += 1
+        return False, 0, retry_after
+
+    try:
+        allowed, remaining, retry_ms = await _token_bucket()(
+            keys=[key],
+            args=[rule.limit, rule.period * 1000]
+        )
+    except Exception as e:
+        # redis yoksa herkesi kesmektense limitsiz devam
+        rate_limit_stats["errors"] += 1
+        print(f"Rate limit check failed, allowing: {e}")
+        return True, rule.limit, 0.0
+
+    if not allowed:
+        _remember_denial(key, retry_ms / 1000)
+        return False, 0, retry_ms / 1000
+    return True, remaining, 0.0
+
+
+async def _monitor_loop_lag() -> None:
+    # sleep'ten ne kadar gec uyandik = loop'ta bekleyen is
+    interval = settings.loop_lag_interval_ms / 1000
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        loop_lag["current_ms"] = lag * 1000
+        loop_lag["max_ms"] = max(loop_lag["max_ms"], lag * 1000)
+        event_loop_lag_seconds.set(lag)
+
+
+async def start_lag_monitor() -> None:
+    global _lag_task
+    if settings.loop_lag_shed_ms > 0 and _lag_task is None:
+        _lag_task = asyncio.create_task(_monitor_loop_lag())
+
+
+async def stop_lag_monitor() -> None:
+    global _lag_task
+    if _lag_task:
+        _lag_task.cancel()
+        try:
+            await _lag_task
+        except asyncio.CancelledError:
+            pass
+        _lag_task = None
+
+
+def get_rate_limit_stats() -> dict:
+    return {
+        **rate_limit_stats,
+        "denial_cache_entries": len(_denied),
+        "loop_lag_ms": round(loop_lag["current_ms"], 2),
+        "loop_lag_max_ms": round(loop_lag["max_ms"], 2)
+    }
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float, headers: dict | None = None) -> None:
+    body = dumps({"detail": detail})
+    raw_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode())
+    ]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.encode(), value.encode()))
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    # duz ASGI, metrics middleware'i gibi; CORS'un icinde ki 429'larda da CORS header'i olsun
+    # router: route template'ine gore kural secmek icin (app.router)
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.rate_limit_enabled
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        matched = _match_route(self.router, scope)
+        route = f"{scope['method']} {matched.path}" if matched else "unmatched"
+        if matched:
+            # route'a hic girmeden donuyoruz, metrics middleware 429/503'u dogru route'a yazsin
+            scope["route"] = matched
+
+        # loop zaten geride kaldiysa istegi hic baslatma, db'ye/bcrypt'e yuk bindirmesin
+        if settings.loop_lag_shed_ms > 0 and loop_lag["current_ms"] > settings.loop_lag_shed_ms:
+            rate_limit_stats["shed"] += 1
+            bound(rate_limit_rejections, route, "shed").inc()
+            await _reject(send, 503, "Server is busy, please try again later", 1)
+            return
+
+        rule = RULES.get(route)
+        bucket = route if rule else "default"
+        rule = rule or DEFAULT_RULE
+
+        key = f"ratelimit:{bucket}:{_identity(rule, scope)}"
+        allowed, _, retry_after = await check_rate_limit(key, rule)
+
+        if not allowed:
+            rate_limit_stats["limited"] += 1
+            bound(rate_limit_rejections, route, "limit").inc()
+            await _reject(send, 429, "Too many requests", retry_after, {
+                "x-ratelimit-limit": str(rule.limit),
+                "x-ratelimit-remaining": "0"
+            })
+            return
+
+        rate_limit_stats["allowed"] += 1
+        await self.app(scope, receive, send)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
 
 from app.database import get_postgres_session
 from app.models.user import User
+from app.models.task import Task
 from app.schemas import (
     UserRegister, 
     UserLogin, 
@@ -12,11 +13,16 @@ from app.schemas import (
     MessageResponse
 )
 from app.services.auth_service import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
-    get_current_user
+    get_token_generation,
+    get_current_user,
+    get_current_user_id,
+    revoke_user_tokens
 )
+from app.services.cache_service import invalidate_cache
+from app.services.stats_service import invalidate_stats
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -31,6 +37,8 @@ async def register(
         select(User).where(User.email == data.email)
     )
     existing_user = result.scalar_one_or_none()
+    # bcrypt surerken connection'i tutmayalim
+    await session.close()
     
     if existing_user:
         raise HTTPException(
@@ -40,7 +48,7 @@ async def register(
     
     user = User(
         email=data.email,
-        password=hash_password(data.password)
+        password=await hash_password_async(data.password)
     )
     
     session.add(user)
@@ -58,6 +66,8 @@ async def login(
         select(User).where(User.email == data.email)
     )
     user = result.scalar_one_or_none()
+    # bcrypt surerken connection'i tutmayalim
+    await session.close()
     
     if not user:
         raise HTTPException(
@@ -65,13 +75,14 @@ async def login(
             detail="Invalid email or password"
         )
     
-    if not verify_password(data.password, user.password):
+    if not await verify_password_async(data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
-    access_token = create_access_token(str(user.id))
+    user_id = str(user.id)
+    access_token = create_access_token(user_id, await get_token_generation(user_id))
     
     return {
         "access_token": access_token,
@@ -88,3 +99,32 @@ async def get_me(
         email=current_user.email,
         created_at=current_user.created_at
     )
+
+
+@router.post("/logout", response_model=MessageResponse)
+async def logout(
+    user_id: str = Depends(get_current_user_id)
+):
+    # bu user'a simdiye kadar verilmis tum tokenlar gecersiz olur
+    await revoke_user_tokens(user_id)
+    
+    return {"message": "Logged out"}
+
+
+@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_me(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_postgres_session)
+):
+    user_id = str(current_user.id)
+    
+    # current_user baska session'dan geldi, id ile siliyoruz
+    await session.execute(delete(User).where(User.id == current_user.id))
+    await session.commit()
+    
+    await Task.find(Task.user_id == user_id).delete()
+    await invalidate_cache(user_id)
+    await invalidate_stats(user_id)
+    await revoke_user_tokens(user_id, deleted=True)
+    
+    return None
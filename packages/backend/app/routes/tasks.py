@@ -1,137 +1,414 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query, Header, Body
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+import gzip
 from bson import ObjectId
 
-from app.models.user import User
 from app.models.task import Task, TaskStatus
 from app.schemas import (
     TaskCreate,
     TaskUpdate,
     TaskResponse,
-    TaskListResponse
+    TaskListResponse,
+    TaskBulkDelete,
+    BulkResponse,
+    ImportResponse,
+    TaskStatsResponse,
+    TaskSearchResult,
+    TaskSearchResponse
+)
+from app.services.auth_service import get_current_user_id
+from app.config import get_settings
+from app.services.cache_service import get_task_list_body, cache_task, uncache_task, invalidate_cache
+from app.services.export_service import stream_tasks_export, EXPORT_MEDIA_TYPES
+from app.services.import_service import import_tasks, detect_import_format, ImportFormatError
+from app.services.search_service import search_tasks
+from app.services.stats_service import (
+    get_task_stats,
+    record_task_created,
+    record_task_updated,
+    record_task_deleted,
+    invalidate_stats
+)
+from app.services.task_service import (
+    find_tasks_page,
+    task_to_dict,
+    bulk_create_tasks,
+    bulk_update_tasks,
+    bulk_delete_tasks,
+    update_task_fields,
+    delete_task_document,
+    get_write_failure_status,
+    search_fields,
+    utcnow_ms,
+    InvalidCursorError
 )
-from app.services.auth_service import get_current_user
-from app.services.cache_service import get_tasks_with_cache, invalidate_cache
 from app.services.websocket_service import (
     emit_task_created,
     emit_task_updated,
-    emit_task_deleted
+    emit_task_deleted,
+    emit_tasks_bulk,
+    emit_tasks_imported
 )
 
+settings = get_settings()
+
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak karsilastirma, W/ onekini at
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in header.split(",")
+    )
+
+
 @router.get("", response_model=TaskListResponse)
 async def get_tasks(
     response: Response,
-    current_user: User = Depends(get_current_user)
+    limit: int | None = Query(default=None, ge=1, le=settings.task_page_max),
+    after: str | None = Query(default=None, description="Cursor from previous page"),
+    status_filter: str | None = Query(
+        default=None, alias="status", pattern="^(todo|in_progress|done)$"
+    ),
+    updated_after: datetime | None = Query(default=None),
+    updated_before: datetime | None = Query(default=None),
+    sort: str | None = Query(default=None, pattern="^-?(updated_at|created_at)$"),
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+    user_id: str = Depends(get_current_user_id)
+):
+    paginated = any(
+        param is not None
+        for param in [limit, after, status_filter, updated_after, updated_before, sort]
+    )
+    
+    # parametre varsa direkt index'li sorgu, cache sadece tam liste icin
+    if paginated:
+        try:
+            tasks, next_cursor = await find_tasks_page(
+                user_id,
+                limit=limit or settings.task_page_size,
+                after=after,
+                status=status_filter,
+                updated_after=updated_after,
+                updated_before=updated_before,
+                sort=sort or "-updated_at"
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        response.headers["X-Cache"] = "BYPASS"
+        
+        return TaskListResponse(
+            tasks=[TaskResponse(**task) for task in tasks],
+            count=len(tasks),
+            next_cursor=next_cursor
+        )
+    
+    # tam liste: redis'teki hazir body'yi model kurmadan direkt yaz
+    body, etag, encoding, cache_status = await get_task_list_body(user_id)
+    
+    headers = {
+        "X-Cache": cache_status,
+        "ETag": etag,
+        "Vary": "Accept-Encoding"
+    }
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if encoding == "gzip":
+        if accept_encoding and "gzip" in accept_encoding:
+            headers["Content-Encoding"] = "gzip"
+        else:
+            body = gzip.decompress(body)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+async def export_tasks(
+    export_format: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    updated_since: datetime | None = Query(default=None),
+    accept_encoding: str | None = Header(default=None),
+    user_id: str = Depends(get_current_user_id)
 ):
-    user_id = str(current_user.id)
+    # tum liste bellege alinmadan cursor'dan direkt yaziliyo
+    compress = bool(accept_encoding and "gzip" in accept_encoding)
     
-    tasks, cache_hit = await get_tasks_with_cache(user_id)
+    headers = {
+        "Content-Disposition": f'attachment; filename="tasks.{export_format}"',
+        # bi sonraki artimli export icin updated_since olarak kullanilabilir
+        "X-Export-Timestamp": datetime.utcnow().isoformat(),
+        "Vary": "Accept-Encoding"
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
     
-    response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+    return StreamingResponse(
+        stream_tasks_export(user_id, export_format, updated_since, compress),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers
+    )
+
+
+@router.get("/search", response_model=TaskSearchResponse)
+async def search_tasks_route(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int | None = Query(default=None, ge=1, le=settings.task_page_max),
+    after: str | None = Query(default=None, description="Cursor from previous page"),
+    user_id: str = Depends(get_current_user_id)
+):
+    # tum listeyi client'a yollamak yerine (user_id, search_terms) index'inden
+    try:
+        tasks, next_cursor = await search_tasks(
+            user_id,
+            q,
+            limit=limit or settings.search_page_size,
+            after=after
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     
-    return TaskListResponse(
-        tasks=[TaskResponse(**task) for task in tasks],
-        count=len(tasks)
+    return TaskSearchResponse(
+        tasks=[TaskSearchResult(**task) for task in tasks],
+        count=len(tasks),
+        next_cursor=next_cursor
     )
 
 
+@router.get("/stats", response_model=TaskStatsResponse)
+async def task_stats(
+    days: int = Query(default=settings.stats_default_days, ge=1, le=settings.stats_max_days),
+    user_id: str = Depends(get_current_user_id)
+):
+    # sayaclar redis'te, yoksa mongo aggregation ile bir kere kurulup yaziliyo
+    return TaskStatsResponse(**await get_task_stats(user_id, days))
+
+
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     data: TaskCreate,
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    user_id: str = Depends(get_current_user_id)
 ):
-    user_id = str(current_user.id)
-    
+    now = utcnow_ms()
     task = Task(
         user_id=user_id,
         title=data.title,
         description=data.description,
-        status=TaskStatus(data.status)
+        status=TaskStatus(data.status),
+        created_at=now,
+        updated_at=now,
+        completed_at=now if data.status == TaskStatus.DONE.value else None,
+        **search_fields(data.title, data.description)
     )
     
     await task.insert()
     
-    await invalidate_cache(user_id)
-    await emit_task_created(user_id, str(task.id))
-    
-    return TaskResponse(
-        id=str(task.id),
-        user_id=task.user_id,
-        title=task.title,
-        description=task.description,
-        status=task.status.value,
-        created_at=task.created_at,
-        updated_at=task.updated_at
+    task_data = task_to_dict(task)
+    
+    await cache_task(user_id, task_data, created=True)
+    await record_task_created(user_id, task_data)
+    await emit_task_created(user_id, task_data)
+    
+    response.headers["ETag"] = f'"{task_data["version"]}"'
+    
+    return TaskResponse(**task_data)
+
+
+def check_bulk_size(count: int) -> None:
+    if count > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many items, max {settings.bulk_max_items} per request"
+        )
+
+
+async def finish_bulk(user_id: str, results: list[dict], event_type: str) -> BulkResponse:
+    affected = [result["id"] for result in results if result["status"] < 300]
+    tasks = [result["task"] for result in results if result.get("task")]
+    
+    # kac task degisirse degissin tek invalidation, tek event
+    if affected:
+        await invalidate_cache(user_id)
+        await invalidate_stats(user_id)
+        await emit_tasks_bulk(user_id, event_type, affected, tasks or None)
+    
+    return BulkResponse(
+        results=results,
+        succeeded=len(affected),
+        failed=len(results) - len(affected)
     )
 
 
-@router.patch("/{task_id}", response_model=TaskResponse)
-async def update_task(
-    task_id: str,
-    data: TaskUpdate,
-    current_user: User = Depends(get_current_user)
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_create(
+    items: list[dict] = Body(...),
+    user_id: str = Depends(get_current_user_id)
 ):
-    user_id = str(current_user.id)
+    check_bulk_size(len(items))
+    
+    results = await bulk_create_tasks(user_id, items)
+    
+    return await finish_bulk(user_id, results, "tasks.created")
+
+
+@router.patch("/bulk", response_model=BulkResponse)
+async def bulk_update(
+    items: list[dict] = Body(...),
+    user_id: str = Depends(get_current_user_id)
+):
+    check_bulk_size(len(items))
+    
+    results = await bulk_update_tasks(user_id, items)
+    
+    return await finish_bulk(user_id, results, "tasks.updated")
+
+
+@router.delete("/bulk", response_model=BulkResponse)
+async def bulk_delete(
+    data: TaskBulkDelete,
+    user_id: str = Depends(get_current_user_id)
+):
+    check_bulk_size(len(data.ids))
+    
+    results = await bulk_delete_tasks(user_id, data.ids)
+    
+    return await finish_bulk(user_id, results, "tasks.deleted")
+
+
+@router.post("/import", response_model=ImportResponse)
+async def import_tasks_route(
+    request: Request,
+    import_format: str | None = Query(default=None, alias="format", pattern="^(ndjson|csv)$"),
+    content_type: str | None = Header(default=None),
+    content_encoding: str | None = Header(default=None),
+    content_length: int | None = Header(default=None),
+    user_id: str = Depends(get_current_user_id)
+):
+    # boyutu belli olan body'yi okumadan reddet, acilmis boyut stream sirasinda ayrica kontrol ediliyo
+    if content_length is not None and content_length > settings.import_max_body_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request body larger than {settings.import_max_body_bytes} bytes"
+        )
     
     try:
-        object_id = ObjectId(task_id)
-    except Exception:
+        import_format = detect_import_format(content_type, import_format)
+    except ImportFormatError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid task ID format"
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(e)
         )
     
-    task = await Task.get(object_id)
+    # body'yi okumadan stream olarak veriyoruz, satir satir parse ediliyo
+    result = await import_tasks(
+        user_id,
+        request.stream(),
+        import_format,
+        gzipped=content_encoding == "gzip"
+    )
     
-    if not task:
+    # satir basina degil, sonda tek invalidation ve tek event
+    if result["imported"]:
+        await invalidate_cache(user_id)
+        await invalidate_stats(user_id)
+        await emit_tasks_imported(user_id, result["imported"])
+    
+    return ImportResponse(**result)
+
+
+def parse_if_match(if_match: str | None) -> int | None:
+    # If-Match: "3" ya da W/"3" -> 3, "*" -> task varsa hangi version olursa
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match header, expected task version"
+        )
+
+
+async def raise_write_failure(user_id: str, object_id: ObjectId, action: str):
+    failure = await get_write_failure_status(user_id, object_id)
+    
+    if failure == status.HTTP_404_NOT_FOUND:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
     # baska birinin taskini update etmeye calisiyosa
-    if task.user_id != user_id:
+    if failure == status.HTTP_403_FORBIDDEN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this task"
+            detail=f"Not authorized to {action} this task"
         )
     
-    update_data = data.model_dump(exclude_unset=True)
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Task was modified by someone else"
+    )
+
+
+@router.patch("/{task_id}", response_model=TaskResponse)
+async def update_task(
+    task_id: str,
+    data: TaskUpdate,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    user_id: str = Depends(get_current_user_id)
+):
+    try:
+        object_id = ObjectId(task_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid task ID format"
+        )
     
-    if "status" in update_data:
-        update_data["status"] = TaskStatus(update_data["status"])
+    expected_version = parse_if_match(if_match)
     
+    update_data = data.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
     
-    for key, value in update_data.items():
-        setattr(task, key, value)
+    result = await update_task_fields(user_id, object_id, update_data, expected_version)
     
-    await task.save()
+    if result is None:
+        await raise_write_failure(user_id, object_id, "update")
     
-    await invalidate_cache(user_id)
-    await emit_task_updated(user_id, str(task.id))
+    task_data, previous = result
     
-    return TaskResponse(
-        id=str(task.id),
-        user_id=task.user_id,
-        title=task.title,
-        description=task.description,
-        status=task.status.value,
-        created_at=task.created_at,
-        updated_at=task.updated_at
-    )
+    await cache_task(user_id, task_data)
+    await record_task_updated(user_id, previous, task_data)
+    await emit_task_updated(user_id, task_data)
+    
+    response.headers["ETag"] = f'"{task_data["version"]}"'
+    
+    return TaskResponse(**task_data)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     task_id: str,
-    current_user: User = Depends(get_current_user)
+    if_match: str | None = Header(default=None),
+    user_id: str = Depends(get_current_user_id)
 ):
-    user_id = str(current_user.id)
-    
     try:
         object_id = ObjectId(task_id)
     except Exception:
@@ -140,23 +417,15 @@ async def delete_task(
             detail="Invalid task ID format"
         )
     
-    task = await Task.get(object_id)
+    expected_version = parse_if_match(if_match)
     
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    if task.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this task"
-        )
+    deleted = await delete_task_document(user_id, object_id, expected_version)
     
-    await task.delete()
+    if deleted is None:
+        await raise_write_failure(user_id, object_id, "delete")
     
-    await invalidate_cache(user_id)
+    await uncache_task(user_id, task_id)
+    await record_task_deleted(user_id, deleted)
     await emit_task_deleted(user_id, task_id)
     
     return None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import datetime
 
 
@@ -43,6 +43,22 @@ class TaskUpdate(BaseModel):
     description: str | None = Field(default=None, max_length=1000)
     status: str | None = Field(default=None, pattern="^(todo|in_progress|done)$")
 
+    # gonderilmezse degismiyo ama null gonderilirse db'ye null yazilirdi, sadece description silinebilir
+    @field_validator("title", "status")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("cannot be null")
+        return value
+
+
+class TaskBulkUpdate(TaskUpdate):
+    id: str
+
+
+class TaskBulkDelete(BaseModel):
+    ids: list[str] = Field(..., min_length=1)
+
 
 class TaskResponse(BaseModel):
     id: str
@@ -52,6 +68,8 @@ class TaskResponse(BaseModel):
     status: str
     created_at: datetime
     updated_at: datetime
+    completed_at: datetime | None = None
+    version: int = 0
 
     class Config:
         from_attributes = True
@@ -60,6 +78,58 @@ class TaskResponse(BaseModel):
 class TaskListResponse(BaseModel):
     tasks: list[TaskResponse]
     count: int
+    next_cursor: str | None = None
+
+
+class TaskSearchResult(TaskResponse):
+    score: int
+
+
+class TaskSearchResponse(BaseModel):
+    tasks: list[TaskSearchResult]
+    count: int
+    next_cursor: str | None = None
+
+
+class DailyTaskStats(BaseModel):
+    date: str
+    created: int
+    completed: int
+
+
+class TaskStatsResponse(BaseModel):
+    by_status: dict[str, int]
+    total: int
+    days: list[DailyTaskStats]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: str | None = None
+    status: int
+    error: str | None = None
+    task: TaskResponse | None = None
+
+
+class BulkResponse(BaseModel):
+    results: list[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportResponse(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+    errors_truncated: bool
+    seconds: float
+    rows_per_second: float
 
 
 # health
@@ -68,3 +138,13 @@ class HealthResponse(BaseModel):
     postgres: str
     mongodb: str
     redis: str
+
+
+class ProbeResult(BaseModel):
+    status: str
+    latency_ms: float
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    checks: dict[str, ProbeResult]
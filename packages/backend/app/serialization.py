@@ -0,0 +1,93 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse as BaseJSONResponse
+
+from app.config import get_settings
+
+settings = get_settings()
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _default(obj: Any) -> Any:
+    # datetime/uuid/enum orjson ve msgspec'te native, stdlib icin burda
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (ObjectId, UUID)):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _select_backend() -> str:
+    backend = settings.json_backend
+    if backend == "auto":
+        if orjson is not None:
+            return "orjson"
+        if msgspec is not None:
+            return "msgspec"
+        return "json"
+    if (backend == "orjson" and orjson is None) or (backend == "msgspec" and msgspec is None):
+        raise RuntimeError(f"JSON backend '{backend}' is not installed")
+    return backend
+
+
+BACKEND = _select_backend()
+
+if BACKEND == "orjson":
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder(enc_hook=_default)
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def loads(data: bytes | str) -> Any:
+        return _decoder.decode(data)
+
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode()
+
+
+class JSONResponse(BaseJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# python-socketio stdlib json modulu gibi bi sey bekliyo (dumps str donmeli)
+class SocketIOJSON:
+    @staticmethod
+    def dumps(obj: Any, *args, **kwargs) -> str:
+        return dumps_str(obj)
+
+    @staticmethod
+    def loads(data: bytes | str, *args, **kwargs) -> Any:
+        return loads(data)
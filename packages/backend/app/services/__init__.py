@@ -1,31 +1,93 @@
 from app.services.auth_service import (
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
+    get_password_pool_stats,
     create_access_token,
     decode_access_token,
-    get_current_user
+    decode_access_token_cached,
+    get_current_user,
+    get_current_user_id,
+    revoke_user_tokens
 )
 from app.services.cache_service import (
-    get_tasks_with_cache,
-    invalidate_cache
+    get_task_list_body,
+    cache_task,
+    uncache_task,
+    invalidate_cache,
+    get_cache_stats
+)
+from app.services.task_service import (
+    task_to_dict,
+    find_tasks_page,
+    iter_task_batches,
+    load_task_dicts,
+    bulk_create_tasks,
+    bulk_update_tasks,
+    bulk_delete_tasks,
+    update_task_fields,
+    delete_task_document
+)
+from app.services.export_service import stream_tasks_export
+from app.services.import_service import import_tasks
+from app.services.search_service import search_tasks, start_search_backfill, stop_search_backfill
+from app.services.stats_service import (
+    get_task_stats,
+    record_task_created,
+    record_task_updated,
+    record_task_deleted,
+    invalidate_stats
 )
 from app.services.websocket_service import (
     sio,
     emit_task_created,
     emit_task_updated,
-    emit_task_deleted
+    emit_task_deleted,
+    emit_tasks_bulk,
+    emit_tasks_imported
 )
 
 __all__ = [
     "hash_password",
     "verify_password", 
+    "hash_password_async",
+    "verify_password_async",
+    "get_password_pool_stats",
     "create_access_token",
     "decode_access_token",
+    "decode_access_token_cached",
     "get_current_user",
-    "get_tasks_with_cache",
+    "get_current_user_id",
+    "revoke_user_tokens",
+    "get_task_list_body",
+    "cache_task",
+    "uncache_task",
     "invalidate_cache",
+    "get_cache_stats",
+    "task_to_dict",
+    "find_tasks_page",
+    "iter_task_batches",
+    "load_task_dicts",
+    "bulk_create_tasks",
+    "bulk_update_tasks",
+    "bulk_delete_tasks",
+    "update_task_fields",
+    "delete_task_document",
+    "stream_tasks_export",
+    "import_tasks",
+    "search_tasks",
+    "start_search_backfill",
+    "stop_search_backfill",
+    "get_task_stats",
+    "record_task_created",
+    "record_task_updated",
+    "record_task_deleted",
+    "invalidate_stats",
     "sio",
     "emit_task_created",
     "emit_task_updated",
-    "emit_task_deleted"
+    "emit_task_deleted",
+    "emit_tasks_bulk",
+    "emit_tasks_imported"
 ]
@@ -1,3 +1,9 @@
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from passlib.context import CryptContext
@@ -7,14 +13,42 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.config import get_settings
+from app.metrics import auth_seconds, password_seconds, bound
 from app.models.user import User
-from app.database import get_postgres_session
+from app.database import get_redis, AsyncSessionLocal
+from app.services.pubsub_service import subscribe, publish
 
 settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# bcrypt event loop'u bloklamasin diye ayri thread pool'da
+# bcrypt GIL'i birakiyo, process pool'a gerek yok
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.bcrypt_workers,
+    thread_name_prefix="bcrypt"
+)
+password_pool_stats = {
+    "in_flight": 0,
+    "completed": 0,
+    "rejected": 0,
+    "avg_seconds": 0.0
+}
+
+REVOCATION_CHANNEL = "auth:revocations"
+USER_DELETED = "deleted"
+
+# user_id -> (generation, cache_until), LRU
+# generation: None = revoke yok, int = daha kucuk "gen" claim'li tokenlar gecersiz, "deleted"
+# saniyeli zaman karsilastirmasi logout'la ayni saniyede alinan token'i da olduruyodu, sayac oyle degil
+_user_state_cache: OrderedDict[str, tuple[int | str | None, float]] = OrderedDict()
+
+# token hash -> (payload, exp), LRU
+# reconnect firtinasinda ayni token'i tekrar tekrar jwt.decode etmeyelim
+_token_cache: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+token_cache_stats = {"hits": 0, "misses": 0}
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -24,32 +58,87 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def create_access_token(user_id: str) -> str:
+def _password_retry_after() -> int:
+    # kuyruktakilerin bitmesi icin tahmini sure
+    queued = password_pool_stats["in_flight"] - settings.bcrypt_workers
+    seconds = max(queued, 1) / settings.bcrypt_workers * password_pool_stats["avg_seconds"]
+    return max(1, math.ceil(seconds))
+
+
+async def _run_in_password_pool(func, *args):
+    limit = settings.bcrypt_workers + settings.bcrypt_max_queue
+    if password_pool_stats["in_flight"] >= limit:
+        password_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again later",
+            headers={"Retry-After": str(_password_retry_after())}
+        )
+
+    password_pool_stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        elapsed = time.perf_counter() - started
+        bound(password_seconds, func.__name__).observe(elapsed)
+        password_pool_stats["in_flight"] -= 1
+        password_pool_stats["completed"] += 1
+        # ewma
+        password_pool_stats["avg_seconds"] += 0.1 * (elapsed - password_pool_stats["avg_seconds"])
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_password_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+def get_password_pool_stats() -> dict:
+    in_flight = password_pool_stats["in_flight"]
+    return {
+        "workers": settings.bcrypt_workers,
+        "max_queue": settings.bcrypt_max_queue,
+        "in_flight": in_flight,
+        "queue_depth": max(0, in_flight - settings.bcrypt_workers),
+        "completed": password_pool_stats["completed"],
+        "rejected": password_pool_stats["rejected"],
+        "avg_seconds": round(password_pool_stats["avg_seconds"], 4)
+    }
+
+
+def get_token_lifetime() -> timedelta:
     # 7d, 24h gibi formatta olabiliyo
     expires_in = settings.jwt_expires_in
     if expires_in.endswith("d"):
-        delta = timedelta(days=int(expires_in[:-1]))
+        return timedelta(days=int(expires_in[:-1]))
     elif expires_in.endswith("h"):
-        delta = timedelta(hours=int(expires_in[:-1]))
-    else:
-        delta = timedelta(days=7)
+        return timedelta(hours=int(expires_in[:-1]))
+    return timedelta(days=7)
+
+
+def create_access_token(user_id: str, generation: int = 0) -> str:
+    expire = datetime.utcnow() + get_token_lifetime()
 
-    expire = datetime.utcnow() + delta
-    
     payload = {
         "sub": user_id,
         "exp": expire,
-        "iat": datetime.utcnow()
+        "iat": datetime.utcnow(),
+        # revoke_user_tokens bu sayaci artiriyo, eski generation'li tokenlar gecersiz
+        "gen": generation
     }
-    
+
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
 def decode_access_token(token: str) -> dict | None:
     try:
         payload = jwt.decode(
-            token, 
-            settings.jwt_secret, 
+            token,
+            settings.jwt_secret,
             algorithms=[settings.jwt_algorithm]
         )
         return payload
@@ -57,38 +146,173 @@ def decode_access_token(token: str) -> dict | None:
         return None
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: AsyncSession = Depends(get_postgres_session)
-) -> User:
-    token = credentials.credentials
-    
+def decode_access_token_cached(token: str) -> dict | None:
+    # token'in kendisini degil hash'ini tutuyoruz
+    key = hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        payload, expires_at = cached
+        if expires_at > time.time():
+            _token_cache.move_to_end(key)
+            token_cache_stats["hits"] += 1
+            return payload
+        del _token_cache[key]
+
+    token_cache_stats["misses"] += 1
     payload = decode_access_token(token)
+    # sadece gecerli tokenlar cache'leniyo, exp gelince kendiliginden dusuyo
+    if payload is not None and "exp" in payload:
+        _token_cache[key] = (payload, float(payload["exp"]))
+        while len(_token_cache) > settings.auth_token_cache_size:
+            _token_cache.popitem(last=False)
+    return payload
+
+
+def get_token_cache_stats() -> dict:
+    return {**token_cache_stats, "entries": len(_token_cache)}
+
+
+def _parse_generation(value: str | None) -> int | str | None:
+    if value is None or value == USER_DELETED:
+        return value
+    return int(value)
+
+
+def _cache_user_state(user_id: str, generation: int | str | None) -> None:
+    _user_state_cache[user_id] = (generation, time.monotonic() + settings.auth_user_cache_ttl)
+    _user_state_cache.move_to_end(user_id)
+    while len(_user_state_cache) > settings.auth_user_cache_size:
+        _user_state_cache.popitem(last=False)
+
+
+def _on_revocation(message: str) -> None:
+    # diger worker/node'lardan gelen revoke
+    user_id, _, value = message.partition(":")
+    _cache_user_state(user_id, _parse_generation(value))
+
+
+subscribe(REVOCATION_CHANNEL, _on_revocation)
+
+
+def get_revocation_key(user_id: str) -> str:
+    return f"auth:revoked:{user_id}"
+
+
+async def get_revocation_state(user_id: str) -> int | str | None:
+    # her istekte, cache'li
+    cached = _user_state_cache.get(user_id)
+    if cached and cached[1] > time.monotonic():
+        _user_state_cache.move_to_end(user_id)
+        return cached[0]
+
+    redis = get_redis()
+    generation = _parse_generation(await redis.get(get_revocation_key(user_id)))
+    _cache_user_state(user_id, generation)
+    return generation
+
+
+async def get_token_generation(user_id: str) -> int:
+    # token verirken cache'e bakmiyoruz, baska node'daki logout henuz yayilmamis olabilir
+    # yoksa yeni token eski generation'la cikar ve hemen gecersiz sayilir
+    generation = _parse_generation(await get_redis().get(get_revocation_key(user_id)))
+    return generation if isinstance(generation, int) else 0
+
+
+def is_token_revoked(payload: dict, generation: int | str | None) -> bool:
+    # gen claim'i olmayan eski tokenlar 0 sayiliyo
+    return isinstance(generation, int) and payload.get("gen", 0) < generation
+
+
+async def revoke_user_tokens(user_id: str, deleted: bool = False) -> None:
+    # simdiye kadar verilen tum tokenlar gecersiz, token omru kadar tutmak yeterli
+    key = get_revocation_key(user_id)
+    ttl = int(get_token_lifetime().total_seconds())
+
+    redis = get_redis()
+    if deleted:
+        value = USER_DELETED
+        await redis.set(key, value, ex=ttl)
+    else:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, ttl)
+            generation, _ = await pipe.execute()
+        value = str(generation)
+
+    _cache_user_state(user_id, _parse_generation(value))
+    await publish(REVOCATION_CHANNEL, f"{user_id}:{value}")
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+async def verify_token(token: str) -> dict:
+    payload = decode_access_token_cached(token)
     if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
-    
+        raise _unauthorized("Invalid or expired token")
+
     user_id = payload.get("sub")
     if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
-    
+        raise _unauthorized("Invalid token payload")
+
+    generation = await get_revocation_state(user_id)
+    if generation == USER_DELETED:
+        raise _unauthorized("User not found")
+    if is_token_revoked(payload, generation):
+        raise _unauthorized("Token has been revoked")
+
+    return payload
+
+
+async def get_user_by_id(session: AsyncSession, user_id: str) -> User | None:
     result = await session.execute(
         select(User).where(User.id == user_id)
     )
-    user = result.scalar_one_or_none()
-    
+    return result.scalar_one_or_none()
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    started = time.perf_counter()
+    try:
+        payload = await verify_token(credentials.credentials)
+
+        # session'i request sonuna kadar tutmuyoruz, connection hemen pool'a donsun
+        async with AsyncSessionLocal() as session:
+            user = await get_user_by_id(session, payload["sub"])
+    finally:
+        bound(auth_seconds, "get_current_user").observe(time.perf_counter() - started)
+
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
-    
+        raise _unauthorized("User not found")
+
     return user
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> str:
+    started = time.perf_counter()
+    try:
+        payload = await verify_token(credentials.credentials)
+        user_id = payload["sub"]
+
+        # stateless modda token + revoke cache yeterli, postgres'e gitmiyoruz
+        if settings.auth_stateless:
+            return user_id
+
+        async with AsyncSessionLocal() as session:
+            user = await get_user_by_id(session, user_id)
+    finally:
+        bound(auth_seconds, "get_current_user_id").observe(time.perf_counter() - started)
+
+    if user is None:
+        raise _unauthorized("User not found")
+
+    return user_id
@@ -1,69 +1,365 @@
-import json
+import asyncio
+import gzip
+import hashlib
+import random
+import time
+import uuid
 from typing import Tuple
-from app.database import get_redis
+from app.database import get_redis, get_redis_binary
 from app.config import get_settings
-from app.models.task import Task
+from app.services.task_service import load_task_dicts
+from app.services.local_cache import LocalCache
+from app.services.pubsub_service import subscribe
+from app.serialization import dumps_str, loads
+from app.metrics import cache_lookups, cache_redis_seconds, bound
 
 settings = get_settings()
 
+# hash icinde "tam liste yuklu" isareti, bos liste de cache'lenebilsin diye
+# degeri listenin taze sayildigi son an (epoch sn)
+COMPLETE_FIELD = "_"
+GENERATION_TTL = 86400
+BUILD_TTL = 60
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# her yazma gen'i artiriyo, rebuild sadece gen degismediyse yaziliyo
+# update'te task hash'te yoksa (silinmis ya da create henuz yazilmamis) hash'i komple atiyoruz
+# ayni task'e eszamanli update'lerde version'i buyuk olan kazanir
+# publish da script icinde, L1 invalidation icin ekstra round trip yok
+# KEYS[3] hazir response body, her yazmada siliniyo
+WRITE_TASK_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+redis.call('DEL', KEYS[3])
+redis.call('PUBLISH', ARGV[6], ARGV[7])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if not current then
+    if ARGV[4] == 'update' then
+        redis.call('DEL', KEYS[1])
+        return 0
+    end
+elseif (cjson.decode(current)['version'] or 0) > tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+DELETE_TASK_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('DEL', KEYS[3])
+redis.call('PUBLISH', ARGV[3], ARGV[4])
+return redis.call('HDEL', KEYS[1], ARGV[1])
+"""
+
+# rebuild: task'ler once gecici key'e parca parca pipeline ile yaziliyo (tek dev EVALSHA redis'i bloklamasin)
+# sonra bu script gen hala ayniysa gecici key'i yerine koyuyo, degilse atiyo
+# KEYS[4] gecici key, eski hash UNLINK ile arka planda siliniyo
+REBUILD_SCRIPT = """
+local generation = redis.call('GET', KEYS[2]) or ''
+if generation ~= ARGV[1] then
+    redis.call('UNLINK', KEYS[4])
+    return 0
+end
+redis.call('HSET', KEYS[4], '_', ARGV[3])
+redis.call('UNLINK', KEYS[1], KEYS[3])
+redis.call('RENAME', KEYS[4], KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# body, task hash'ten uretildigi andaki gen hala gecerliyse ve ayni TTL ile yaziliyo
+STORE_BODY_SCRIPT = """
+local generation = redis.call('GET', KEYS[2]) or ''
+if generation ~= ARGV[1] then
+    return 0
+end
+local ttl = redis.call('PTTL', KEYS[3])
+if ttl <= 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'etag', ARGV[2], 'body', ARGV[3], 'fresh_until', ARGV[4], 'encoding', ARGV[5])
+redis.call('PEXPIRE', KEYS[1], ttl)
+return 1
+"""
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_scripts: dict = {}
+
+# ayni process'te ayni user icin tek rebuild
+_inflight: dict[str, asyncio.Task] = {}
+
+# L1: redis'in onunde process ici cache, opsiyonel
+local_cache = LocalCache(
+    max_entries=settings.l1_cache_max_entries,
+    max_bytes=settings.l1_cache_max_bytes,
+    ttl=settings.l1_cache_ttl
+)
+redis_stats = {"hits": 0, "stale": 0, "misses": 0}
+
+
+def _on_invalidation(user_id: str) -> None:
+    # baska worker/node'da yazma oldu
+    local_cache.invalidate(user_id)
+
+
+subscribe(INVALIDATION_CHANNEL, _on_invalidation)
+
+
+def _script(source: str, redis=None):
+    # register_script sha'yi hesapliyo, client basina bir kere yeter
+    redis = redis or get_redis()
+    script = _scripts.get(source)
+    if script is None or script.registered_client is not redis:
+        script = redis.register_script(source)
+        _scripts[source] = script
+    return script
+
 
 def get_cache_key(user_id: str) -> str:
     return f"tasks:user:{user_id}"
 
 
-async def get_cached_tasks(user_id: str) -> Tuple[list[dict] | None, bool]:
-    redis = get_redis()
-    cache_key = get_cache_key(user_id)
-    
-    cached = await redis.get(cache_key)
-    
-    if cached:
-        tasks = json.loads(cached)
-        return tasks, True
-    
-    return None, False
+def get_generation_key(user_id: str) -> str:
+    return f"tasks:user:{user_id}:gen"
 
 
-async def set_cached_tasks(user_id: str, tasks: list[dict]) -> None:
-    redis = get_redis()
-    cache_key = get_cache_key(user_id)
-    
-    await redis.setex(
-        cache_key,
-        settings.cache_ttl,
-        json.dumps(tasks, default=str)
+def get_lock_key(user_id: str) -> str:
+    return f"tasks:user:{user_id}:lock"
+
+
+def get_body_key(user_id: str) -> str:
+    return f"tasks:user:{user_id}:body"
+
+
+def get_build_key(user_id: str) -> str:
+    # ayni user icin iki rebuild (farkli worker) birbirinin yarim hash'ine yazmasin
+    return f"tasks:user:{user_id}:build:{uuid.uuid4().hex}"
+
+
+def _cache_keys(user_id: str) -> list[str]:
+    return [get_cache_key(user_id), get_generation_key(user_id), get_body_key(user_id)]
+
+
+def get_jittered_ttl() -> int:
+    # ayni anda olusan key'ler ayni anda expire olmasin
+    jitter = settings.cache_ttl * settings.cache_ttl_jitter
+    return max(1, int(settings.cache_ttl + random.uniform(-jitter, jitter)))
+
+
+def get_cache_stats() -> dict:
+    return {
+        "l1_enabled": settings.l1_cache_enabled,
+        "l1": local_cache.get_stats(),
+        "l2": dict(redis_stats)
+    }
+
+
+async def read_cached_tasks(user_id: str) -> list[dict] | None:
+    started = time.perf_counter()
+    cached = await get_redis().hgetall(get_cache_key(user_id))
+    bound(cache_redis_seconds, "hash_read").observe(time.perf_counter() - started)
+
+    if not cached:
+        return None
+    cached.pop(COMPLETE_FIELD, None)
+    # hash sirasizdir, id (ObjectId) olusturma sirasini veriyo
+    return [loads(cached[task_id]) for task_id in sorted(cached)]
+
+
+async def set_cached_tasks(user_id: str, tasks: list[dict], generation: str | None) -> bool:
+    ttl = get_jittered_ttl()
+    build_key = get_build_key(user_id)
+    chunk_size = settings.cache_rebuild_chunk_size
+
+    # yarida kalirsa (process oldu) gecici key kendiliginden dussun
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for start in range(0, len(tasks), chunk_size):
+            mapping = {task["id"]: dumps_str(task) for task in tasks[start:start + chunk_size]}
+            pipe.hset(build_key, mapping=mapping)
+            pipe.expire(build_key, BUILD_TTL)
+            # her parca ayri round trip, arada diger client'larin komutlari calisabiliyo
+            await pipe.execute()
+
+    # taze sure bitince cache_stale_ttl kadar daha eski veri verilebilir
+    written = await _script(REBUILD_SCRIPT)(
+        keys=[*_cache_keys(user_id), build_key],
+        args=[generation or "", ttl + settings.cache_stale_ttl, time.time() + ttl]
     )
+    return bool(written)
+
+
+async def cache_task(user_id: str, task: dict, created: bool = False) -> None:
+    await _script(WRITE_TASK_SCRIPT)(
+        keys=_cache_keys(user_id),
+        args=[
+            task["id"],
+            dumps_str(task),
+            task["version"],
+            "create" if created else "update",
+            GENERATION_TTL,
+            INVALIDATION_CHANNEL,
+            user_id
+        ]
+    )
+    local_cache.invalidate(user_id)
+
+
+async def uncache_task(user_id: str, task_id: str) -> None:
+    await _script(DELETE_TASK_SCRIPT)(
+        keys=_cache_keys(user_id),
+        args=[task_id, GENERATION_TTL, INVALIDATION_CHANNEL, user_id]
+    )
+    local_cache.invalidate(user_id)
 
 
 async def invalidate_cache(user_id: str) -> None:
+    # toplu degisikliklerde tek tek yamamak yerine komple at
+    redis = get_redis()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.incr(get_generation_key(user_id))
+        pipe.expire(get_generation_key(user_id), GENERATION_TTL)
+        pipe.delete(get_cache_key(user_id), get_body_key(user_id))
+        pipe.publish(INVALIDATION_CHANNEL, user_id)
+        await pipe.execute()
+    local_cache.invalidate(user_id)
+
+
+async def load_tasks(user_id: str) -> list[dict]:
+    # mongo'yu okumadan once gen'i al, arada yazma olursa eski listeyi yazmayalim
     redis = get_redis()
+    generation = await redis.get(get_generation_key(user_id))
+
+    # primary'den okuyoruz: geride kalmis secondary'den gelen liste guncel gen ile cache'e yazilirdi
+    tasks_data = await load_task_dicts(user_id)
+
+    await set_cached_tasks(user_id, tasks_data, generation)
+
+    return tasks_data
+
+
+async def rebuild_cache(user_id: str) -> list[dict]:
+    redis = get_redis()
+    lock_key = get_lock_key(user_id)
+    token = uuid.uuid4().hex
+
+    # processler arasi kilit, alan rebuild eder
+    if await redis.set(lock_key, token, nx=True, px=settings.cache_lock_ttl_ms):
+        try:
+            return await load_tasks(user_id)
+        finally:
+            await _script(RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[token])
+
+    # kilit baskasinda, cache dolana kadar bekle
+    # beklerken sadece EXISTS, hash bi kere okunup decode ediliyo
     cache_key = get_cache_key(user_id)
-    await redis.delete(cache_key)
-
-
-async def get_tasks_with_cache(user_id: str) -> Tuple[list[dict], bool]:
-    # once cachee bak
-    cached_tasks, cache_hit = await get_cached_tasks(user_id)
-    
-    if cache_hit and cached_tasks is not None:
-        return cached_tasks, True
-    
-    # cachede yoksa mongodan cek
-    tasks = await Task.find(Task.user_id == user_id).to_list()
-    
-    tasks_data = [
-        {
-            "id": str(task.id),
-            "user_id": task.user_id,
-            "title": task.title,
-            "description": task.description,
-            "status": task.status.value,
-            "created_at": task.created_at.isoformat(),
-            "updated_at": task.updated_at.isoformat()
-        }
-        for task in tasks
-    ]
-    
-    await set_cached_tasks(user_id, tasks_data)
-    
-    return tasks_data, False
+    deadline = time.monotonic() + settings.cache_lock_wait_ms / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        if await redis.exists(cache_key):
+            cached_tasks = await read_cached_tasks(user_id)
+            if cached_tasks is not None:
+                return cached_tasks
+
+    # kilit sahibi cok yavas ya da oldu, kendimiz yukleyelim
+    return await load_tasks(user_id)
+
+
+def _rebuild_single_flight(user_id: str) -> asyncio.Task:
+    task = _inflight.get(user_id)
+    if task is None:
+        task = asyncio.create_task(rebuild_cache(user_id))
+        _inflight[user_id] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            _inflight.pop(user_id, None)
+            # arka plan yenilemesinde hatayi kimse beklemiyo olabilir
+            if not finished.cancelled() and finished.exception():
+                print(f"[CACHE] Rebuild failed for {user_id}: {finished.exception()}")
+
+        task.add_done_callback(_done)
+    return task
+
+
+def encode_list_body(raw_tasks: list[str]) -> Tuple[bytes, str, str]:
+    # TaskListResponse ile ayni json, task'ler zaten json string, decode etmeden birlestiriyoruz
+    body = (
+        '{"tasks":[' + ",".join(raw_tasks)
+        + '],"count":' + str(len(raw_tasks)) + ',"next_cursor":null}'
+    ).encode()
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    if settings.cache_body_compression:
+        return gzip.compress(body, compresslevel=1), etag, "gzip"
+    return body, etag, ""
+
+
+async def get_task_list_body(user_id: str) -> Tuple[bytes, str, str, str]:
+    # donus: body, etag, encoding ("gzip" ya da ""), cache durumu
+    if settings.l1_cache_enabled:
+        cached = local_cache.get(user_id)
+        if cached is not None:
+            bound(cache_lookups, "body", "L1").inc()
+            return (*cached, "L1")
+    l1_generation = local_cache.generation
+
+    # 1) redis'te hazir body
+    started = time.perf_counter()
+    stored = await get_redis_binary().hgetall(get_body_key(user_id))
+    bound(cache_redis_seconds, "body_read").observe(time.perf_counter() - started)
+
+    if stored:
+        body = stored[b"body"]
+        etag = stored[b"etag"].decode()
+        encoding = stored[b"encoding"].decode()
+        fresh_until = float(stored[b"fresh_until"])
+    else:
+        # 2) task hash'ten body uret ve sakla
+        redis = get_redis()
+        started = time.perf_counter()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(get_cache_key(user_id))
+            pipe.get(get_generation_key(user_id))
+            cached, generation = await pipe.execute()
+        bound(cache_redis_seconds, "hash_read").observe(time.perf_counter() - started)
+
+        if not cached:
+            # 3) hic yok, mongodan
+            redis_stats["misses"] += 1
+            bound(cache_lookups, "body", "MISS").inc()
+            tasks_data = await asyncio.shield(_rebuild_single_flight(user_id))
+            body, etag, encoding = encode_list_body(
+                [dumps_str(task) for task in tasks_data]
+            )
+            return body, etag, encoding, "MISS"
+
+        fresh_until = float(cached.pop(COMPLETE_FIELD, 0))
+        body, etag, encoding = encode_list_body([cached[task_id] for task_id in sorted(cached)])
+
+        await _script(STORE_BODY_SCRIPT, get_redis_binary())(
+            keys=[get_body_key(user_id), get_generation_key(user_id), get_cache_key(user_id)],
+            args=[generation or "", etag, body, fresh_until, encoding]
+        )
+
+    if fresh_until <= time.time():
+        # eskiyi hemen don, arkada yenile
+        redis_stats["stale"] += 1
+        bound(cache_lookups, "body", "STALE").inc()
+        _rebuild_single_flight(user_id)
+        return body, etag, encoding, "STALE"
+
+    redis_stats["hits"] += 1
+    bound(cache_lookups, "body", "L2").inc()
+    if settings.l1_cache_enabled:
+        local_cache.set(user_id, (body, etag, encoding), len(body), l1_generation)
+    return body, etag, encoding, "L2"
@@ -0,0 +1,54 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator
+
+from app.serialization import dumps
+from app.services.task_service import iter_task_batches
+
+EXPORT_FORMATS = ("ndjson", "csv")
+CSV_FIELDS = ["id", "title", "description", "status", "created_at", "updated_at", "completed_at", "version"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+def _ndjson_chunk(tasks: list[dict]) -> bytes:
+    return b"".join(dumps(task) + b"\n" for task in tasks)
+
+
+def _csv_chunk(tasks: list[dict], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(tasks)
+    return buffer.getvalue().encode()
+
+
+async def stream_tasks_export(
+    user_id: str,
+    export_format: str,
+    updated_since: datetime | None = None,
+    compress: bool = False
+) -> AsyncIterator[bytes]:
+    # bellekte ayni anda en fazla bi batch var, liste hic kurulmuyo
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip header
+
+    if export_format == "csv":
+        first = _csv_chunk([], header=True)
+        yield compressor.compress(first) if compressor else first
+
+    async for batch in iter_task_batches(user_id, updated_since=updated_since):
+        chunk = _ndjson_chunk(batch) if export_format == "ndjson" else _csv_chunk(batch, header=False)
+        if compressor:
+            chunk = compressor.compress(chunk)
+            if not chunk:
+                continue
+        yield chunk
+
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from app.config import get_settings
+from app.database import check_postgres, check_mongodb, check_redis
+
+settings = get_settings()
+
+PROBES = {
+    "postgres": check_postgres,
+    "mongodb": check_mongodb,
+    "redis": check_redis
+}
+
+# son sonuc ve ne zamana kadar gecerli
+_cached: tuple[dict, float] | None = None
+_inflight: asyncio.Task | None = None
+
+
+async def _run_probe(probe) -> dict:
+    started = time.perf_counter()
+    try:
+        status = await asyncio.wait_for(probe(), timeout=settings.health_probe_timeout)
+    except asyncio.TimeoutError:
+        status = "timeout"
+    return {
+        "status": status,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+
+async def _run_probes() -> dict:
+    global _cached
+    # sirayla degil hepsi ayni anda, en yavasi kadar surer
+    results = await asyncio.gather(*(_run_probe(probe) for probe in PROBES.values()))
+    checks = dict(zip(PROBES, results))
+    _cached = (checks, time.monotonic() + settings.health_cache_ttl)
+    return checks
+
+
+async def get_health_checks() -> dict:
+    global _inflight
+    # probe'lar sik sik cagrilsa da veritabanlarina cache suresinde bi kere gidiyoruz
+    if _cached and _cached[1] > time.monotonic():
+        return _cached[0]
+
+    # ayni anda gelen istekler ayni probe'u beklesin
+    if _inflight is None or _inflight.done():
+        _inflight = asyncio.create_task(_run_probes())
+    return await asyncio.shield(_inflight)
+
+
+def is_healthy(checks: dict) -> bool:
+    return all(check["status"] == "connected" for check in checks.values())
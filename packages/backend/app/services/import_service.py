@@ -0,0 +1,276 @@
+import codecs
+import csv
+import time
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterator
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.models.task import Task
+from app.schemas import TaskCreate
+from app.serialization import loads
+from app.services.task_service import new_task_document, validation_message, write_errors_by_index
+
+settings = get_settings()
+
+IMPORT_FORMATS = ("ndjson", "csv")
+# gzip'i bu kadarlik parcalarla aciyoruz, kucuk bi gzip bombasi bellekte tek seferde patlamasin
+INFLATE_CHUNK = 64 * 1024
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class ImportTooLargeError(ValueError):
+    pass
+
+
+class LongLine:
+    # IMPORT_MAX_LINE_LENGTH'i asip atlanan satir; csv tirnak dengesini bozmasin diye tirnak sayisini tasiyo
+    __slots__ = ("quotes",)
+
+    def __init__(self, quotes: int):
+        self.quotes = quotes
+
+
+def detect_import_format(content_type: str | None, requested: str | None) -> str:
+    if requested:
+        return requested
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    raise ImportFormatError("Unsupported content type, use application/x-ndjson or text/csv")
+
+
+def _inflate(decompressor, chunk: bytes) -> Iterator[bytes]:
+    data = decompressor.decompress(chunk, INFLATE_CHUNK)
+    while data:
+        yield data
+        if not decompressor.unconsumed_tail:
+            break
+        data = decompressor.decompress(decompressor.unconsumed_tail, INFLATE_CHUNK)
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes], gzipped: bool) -> AsyncIterator[str | LongLine]:
+    # body'yi parca parca okuyup satir satir veriyo, tamami hic bellege alinmiyo
+    # IMPORT_MAX_LINE_LENGTH'i asan satir bellekte tutulmuyo, yerine LongLine veriliyo
+    decompressor = zlib.decompressobj(wbits=47) if gzipped else None  # 47 = gzip/zlib otomatik
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    max_length = settings.import_max_line_length
+    total = 0
+
+    # yarim kalan satir: parcalar listede, her chunk'ta sadece yeni gelen text'te \n araniyo
+    parts: list[str] = []
+    size = 0
+    skipped: LongLine | None = None
+
+    def split(text: str) -> list[str | LongLine]:
+        nonlocal size, skipped
+        lines = []
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            piece = text[start:] if end == -1 else text[start:end + 1]
+            if skipped:
+                skipped.quotes += piece.count('"')
+            else:
+                size += len(piece)
+                if size > max_length:
+                    skipped = LongLine(sum(part.count('"') for part in parts) + piece.count('"'))
+                    parts.clear()
+                else:
+                    parts.append(piece)
+            if end == -1:
+                return lines
+            lines.append(skipped or "".join(parts))
+            parts.clear()
+            size = 0
+            skipped = None
+            start = end + 1
+
+    async for chunk in chunks:
+        for data in (_inflate(decompressor, chunk) if decompressor else (chunk,)):
+            total += len(data)
+            if total > settings.import_max_body_bytes:
+                raise ImportTooLargeError(f"Request body larger than {settings.import_max_body_bytes} bytes")
+            for line in split(decoder.decode(data)):
+                yield line
+
+    tail = decoder.decode(decompressor.flush() if decompressor else b"", final=True)
+    for line in split(tail):
+        yield line
+    if skipped:
+        yield skipped
+    elif parts:
+        yield "".join(parts)
+
+
+async def _iter_ndjson_rows(lines: AsyncIterator[str | LongLine]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    # (satir no, row, hata)
+    number = 0
+    async for line in lines:
+        number += 1
+        if isinstance(line, LongLine):
+            yield number, None, f"Line longer than {settings.import_max_line_length} characters"
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = loads(line)
+        except Exception:
+            yield number, None, "Invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Row must be a JSON object"
+            continue
+        yield number, row, None
+
+
+async def _iter_csv_rows(lines: AsyncIterator[str | LongLine]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    header = None
+    number = 0
+    # tirnak icindeki satir sonlari: tirnak sayisi cift olana kadar kaydi biriktir
+    # sadece yeni satirin tirnaklari sayiliyo, kayit uzunlugu da sinirli
+    record: list[str] = []
+    size = 0
+    quotes = 0
+    too_long = False
+    async for line in lines:
+        if isinstance(line, LongLine):
+            # tek satiri bile sinirdan uzun, kayit zaten bozuk; tirnaklar yine sayiliyo
+            quotes += line.quotes
+            too_long = True
+            record.clear()
+        else:
+            quotes += line.count('"')
+            if not too_long:
+                size += len(line)
+                if size > settings.import_max_line_length:
+                    too_long = True
+                    record.clear()
+                else:
+                    record.append(line)
+        if quotes % 2:
+            continue
+
+        text = "".join(record)
+        skipped = too_long
+        record.clear()
+        size = quotes = 0
+        too_long = False
+
+        if skipped:
+            number += 1
+            yield number, None, f"Record longer than {settings.import_max_line_length} characters"
+            continue
+        if not text.strip():
+            continue
+
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            number += 1
+            yield number, None, f"Invalid CSV: {e}"
+            continue
+
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        number += 1
+        if len(values) != len(header):
+            yield number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # bos hucreler alan hic yokmus gibi, default'lar gecsin
+        yield number, {key: value for key, value in zip(header, values) if value != ""}, None
+
+    if too_long or "".join(record).strip():
+        number += 1
+        yield number, None, "Invalid CSV: unterminated quoted field"
+
+
+async def import_tasks(
+    user_id: str,
+    chunks: AsyncIterator[bytes],
+    import_format: str,
+    gzipped: bool = False
+) -> dict:
+    started = time.perf_counter()
+    collection = Task.get_motor_collection()
+    batch_size = settings.import_batch_size
+
+    received = 0
+    imported = 0
+    failed = 0
+    errors: list[dict] = []
+
+    def add_error(row: int, message: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.import_max_errors:
+            errors.append({"row": row, "error": message})
+
+    async def flush(documents: list[dict], rows: list[int]) -> None:
+        nonlocal imported
+        try:
+            await collection.insert_many(documents, ordered=False)
+            imported += len(documents)
+        except BulkWriteError as e:
+            write_errors = write_errors_by_index(e)
+            imported += len(documents) - len(write_errors)
+            for index, message in write_errors.items():
+                add_error(rows[index], message)
+
+    lines = _iter_lines(chunks, gzipped)
+    rows = _iter_csv_rows(lines) if import_format == "csv" else _iter_ndjson_rows(lines)
+
+    documents: list[dict] = []
+    positions: list[int] = []
+    now = datetime.utcnow()
+
+    try:
+        async for number, row, error in rows:
+            received += 1
+            if error:
+                add_error(number, error)
+                continue
+            try:
+                data = TaskCreate.model_validate(row)
+            except ValidationError as e:
+                add_error(number, validation_message(e))
+                continue
+
+            documents.append(new_task_document(user_id, data, now))
+            positions.append(number)
+
+            if len(documents) >= batch_size:
+                await flush(documents, positions)
+                documents, positions = [], []
+                now = datetime.utcnow()
+    except (zlib.error, UnicodeDecodeError):
+        # body bozuk, buraya kadar okunanlar yine yaziliyo
+        add_error(received + 1, "Could not decode request body")
+    except ImportTooLargeError as e:
+        # limit asildiginda okumayi kesiyoruz, o ana kadar okunanlar yaziliyo
+        add_error(received + 1, f"{e}, import stopped")
+
+    if documents:
+        await flush(documents, positions)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "received": received,
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(received / elapsed, 1) if elapsed > 0 else 0.0
+    }
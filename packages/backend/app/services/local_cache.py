@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+# process ici LRU cache, hem eleman sayisi hem byte limiti var
+class LocalCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_bytes = 0
+        # her invalidate'te artiyo, okuma suren bi degeri sonradan koymamak icin
+        self.generation = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        # key -> (value, size, expires_at)
+        self._entries: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, key: str, value: Any, size: int, generation: int | None = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + self.ttl)
+        self.size_bytes += size
+
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key: str) -> None:
+        self.generation += 1
+        self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self.size_bytes
+        }
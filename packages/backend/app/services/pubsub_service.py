@@ -0,0 +1,58 @@
+import asyncio
+from typing import Callable
+
+from app.database import get_redis
+
+# channel -> handler listesi, servisler import edilirken kayit oluyo
+handlers: dict[str, list[Callable[[str], None]]] = {}
+
+_listener_task: asyncio.Task | None = None
+
+
+def subscribe(channel: str, handler: Callable[[str], None]) -> None:
+    handlers.setdefault(channel, []).append(handler)
+
+
+async def publish(channel: str, message: str) -> None:
+    redis = get_redis()
+    await redis.publish(channel, message)
+
+
+async def _listen() -> None:
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            await pubsub.subscribe(*handlers.keys())
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                for handler in handlers.get(message["channel"], []):
+                    try:
+                        handler(message["data"])
+                    except Exception as e:
+                        print(f"[PUBSUB] Handler error on {message['channel']}: {e}")
+        except asyncio.CancelledError:
+            await pubsub.aclose()
+            raise
+        except Exception as e:
+            # redis koptuysa biraz bekleyip tekrar abone ol
+            print(f"[PUBSUB] Listener error: {e}")
+            await pubsub.aclose()
+            await asyncio.sleep(1)
+
+
+async def start_pubsub() -> None:
+    global _listener_task
+    if handlers and _listener_task is None:
+        _listener_task = asyncio.create_task(_listen())
+
+
+async def stop_pubsub() -> None:
+    global _listener_task
+    if _listener_task:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
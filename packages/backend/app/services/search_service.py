@@ -0,0 +1,242 @@
+import asyncio
+import base64
+import json
+import re
+import uuid
+from datetime import datetime
+from typing import Tuple
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.config import get_settings
+from app.database import get_redis
+from app.models.task import Task
+from app.services.task_service import (
+    TASK_PROJECTION,
+    LIST_READ_PREFERENCE,
+    InvalidCursorError,
+    document_to_dict,
+    search_fields,
+    tokenize
+)
+
+settings = get_settings()
+
+# title'da gecen kelime description'dakinden agir, tam eslesme prefix'ten agir
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+EXACT_PREFIX_BONUS = 1
+
+BACKFILL_LOCK_KEY = "search:backfill:lock"
+BACKFILL_CURSOR_KEY = "search:backfill:cursor"
+BACKFILL_DONE_KEY = "search:backfill:done"
+
+EXTEND_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    redis.call('SET', KEYS[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_scripts: dict = {}
+_backfill_task: asyncio.Task | None = None
+
+
+def _backfill_script(source: str):
+    redis = get_redis()
+    script = _scripts.get(source)
+    if script is None or script.registered_client is not redis:
+        script = redis.register_script(source)
+        _scripts[source] = script
+    return script
+
+
+def parse_query(q: str) -> Tuple[list[str], str | None]:
+    # son kelime yazilmaya devam ediyo olabilir, o prefix; digerleri tam kelime
+    terms = tokenize(q)[:settings.search_max_query_terms]
+    if not terms:
+        return [], None
+    if q[-1:].isspace():
+        # kelime bitmis, prefix yok
+        return terms, None
+    return terms[:-1], terms[-1]
+
+
+def _has_term(field: str, term: str) -> dict:
+    return {"$in": [term, {"$ifNull": [f"${field}", []]}]}
+
+
+def _has_prefix(field: str, prefix: str) -> dict:
+    return {"$gt": [{"$size": {"$filter": {
+        "input": {"$ifNull": [f"${field}", []]},
+        "as": "term",
+        "cond": {"$regexMatch": {"input": "$$term", "regex": f"^{re.escape(prefix)}"}}
+    }}}, 0]}
+
+
+def _score_expression(terms: list[str], prefix: str | None) -> dict:
+    # $match zaten tum kelimelerin gectigini garanti ediyo, burda sadece nerde gectigine bakiyoruz
+    parts = []
+    for term in terms:
+        parts.append({"$cond": [_has_term("title_terms", term), TITLE_WEIGHT, DESCRIPTION_WEIGHT]})
+    if prefix:
+        parts.append({"$cond": [_has_prefix("title_terms", prefix), TITLE_WEIGHT, DESCRIPTION_WEIGHT]})
+        parts.append({"$cond": [_has_term("search_terms", prefix), EXACT_PREFIX_BONUS, 0]})
+    return {"$add": parts}
+
+
+def encode_search_cursor(doc: dict) -> str:
+    raw = json.dumps(
+        [doc["score"], doc["updated_at"].isoformat(), str(doc["_id"])],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[int, datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, value, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(score), datetime.fromisoformat(value), ObjectId(task_id)
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+
+
+async def search_tasks(
+    user_id: str,
+    q: str,
+    limit: int,
+    after: str | None = None
+) -> Tuple[list[dict], str | None]:
+    terms, prefix = parse_query(q)
+    if not terms and not prefix:
+        return [], None
+
+    # ikisi de (user_id, search_terms) index'ini kullaniyo:
+    # tam kelimeler esitlik, prefix ^... ile index'te range
+    conditions = [{"search_terms": {"$all": terms}}] if terms else []
+    if prefix:
+        conditions.append({"search_terms": {"$regex": f"^{re.escape(prefix)}"}})
+
+    pipeline = [
+        {"$match": {"user_id": user_id, "$and": conditions}},
+        {"$addFields": {"score": _score_expression(terms, prefix)}}
+    ]
+
+    if after:
+        score, updated_at, last_id = decode_search_cursor(after)
+        # keyset: (score, updated_at, _id) uclusunden sonrasi
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "updated_at": {"$lt": updated_at}},
+            {"score": score, "updated_at": updated_at, "_id": {"$lt": last_id}}
+        ]}})
+
+    pipeline += [
+        {"$sort": {"score": -1, "updated_at": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {**TASK_PROJECTION, "score": 1}}
+    ]
+
+    collection = Task.get_motor_collection().with_options(read_preference=LIST_READ_PREFERENCE)
+    docs = await collection.aggregate(pipeline).to_list(None)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_search_cursor(docs[-1])
+
+    return [{**document_to_dict(doc), "score": doc["score"]} for doc in docs], next_cursor
+
+
+async def backfill_search_terms(token: str) -> int:
+    # arama eklenmeden once yazilmis task'lerin kelimelerini doldurur
+    # _id sirasiyla gidiyo, her batch kaldigi yerden; cursor redis'te, worker olurse digeri devam ediyo
+    redis = get_redis()
+    collection = Task.get_motor_collection()
+    cursor = await redis.get(BACKFILL_CURSOR_KEY)
+    last_id = ObjectId(cursor) if cursor else None
+    updated = 0
+    while True:
+        query = {"title_terms": {"$exists": False}}
+        if last_id:
+            query["_id"] = {"$gt": last_id}
+        docs = await collection.find(
+            query,
+            {"title": 1, "description": 1}
+        ).sort("_id", 1).limit(settings.search_backfill_batch_size).to_list(None)
+        if not docs:
+            await redis.set(BACKFILL_DONE_KEY, 1)
+            await redis.delete(BACKFILL_CURSOR_KEY)
+            return updated
+
+        await collection.bulk_write([
+            # arada title/description degistiyse o yazma kendi kelimelerini koydu, ustune yazma
+            UpdateOne(
+                {
+                    "_id": doc["_id"],
+                    "title_terms": {"$exists": False},
+                    "title": doc["title"],
+                    "description": doc.get("description")
+                },
+                {"$set": search_fields(doc["title"], doc.get("description"))}
+            )
+            for doc in docs
+        ], ordered=False)
+        updated += len(docs)
+        last_id = docs[-1]["_id"]
+
+        # lock hala bizdeyse uzat ve cursor'i kaydet, degilse baska worker devraldi
+        if not await _backfill_script(EXTEND_LOCK_SCRIPT)(
+            keys=[BACKFILL_LOCK_KEY, BACKFILL_CURSOR_KEY],
+            args=[token, settings.search_backfill_lock_ttl * 1000, str(last_id)]
+        ):
+            return updated
+
+
+async def _run_backfill() -> None:
+    try:
+        redis = get_redis()
+        if await redis.exists(BACKFILL_DONE_KEY):
+            return
+        token = uuid.uuid4().hex
+        # ayni anda tek worker doldursun, digerleri hic baslamasin
+        if not await redis.set(BACKFILL_LOCK_KEY, token, nx=True, px=settings.search_backfill_lock_ttl * 1000):
+            return
+        try:
+            updated = await backfill_search_terms(token)
+            if updated:
+                print(f"Search terms backfilled for {updated} tasks")
+        finally:
+            await _backfill_script(RELEASE_LOCK_SCRIPT)(keys=[BACKFILL_LOCK_KEY], args=[token])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Search backfill failed: {e}")
+
+
+async def start_search_backfill() -> None:
+    # startup'i bekletmesin, arka planda
+    global _backfill_task
+    if _backfill_task is None:
+        _backfill_task = asyncio.create_task(_run_backfill())
+
+
+async def stop_search_backfill() -> None:
+    global _backfill_task
+    if _backfill_task:
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            pass
+        _backfill_task = None
@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.database import get_redis
+from app.models.task import Task, TaskStatus
+
+settings = get_settings()
+
+BUILT_FIELD = "_built"
+GENERATION_TTL = 86400 * 7
+
+# her yazma gen'i artiriyo, hash varsa sayaclari ayni islemde guncelliyo
+# hash yoksa dokunmuyo, okuyan mongo'dan kurar
+APPLY_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# mongo okunurken arada yazma olduysa (gen degistiyse) eski sayilari yazma
+REBUILD_SCRIPT = """
+local current = redis.call('GET', KEYS[2]) or ''
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_scripts: dict = {}
+
+
+def _script(source: str):
+    redis = get_redis()
+    script = _scripts.get(source)
+    if script is None or script.registered_client is not redis:
+        script = redis.register_script(source)
+        _scripts[source] = script
+    return script
+
+
+def get_stats_key(user_id: str) -> str:
+    return f"tasks:stats:{user_id}"
+
+
+def get_stats_generation_key(user_id: str) -> str:
+    return f"tasks:stats:{user_id}:gen"
+
+
+def _day(value: datetime | str) -> str:
+    if isinstance(value, str):
+        return value[:10]
+    return value.strftime("%Y-%m-%d")
+
+
+def _status(value) -> str:
+    return value.value if isinstance(value, TaskStatus) else value
+
+
+async def _apply(user_id: str, deltas: dict[str, int]) -> None:
+    args = [GENERATION_TTL]
+    for field, delta in deltas.items():
+        if delta:
+            args.extend([field, delta])
+    await _script(APPLY_SCRIPT)(
+        keys=[get_stats_key(user_id), get_stats_generation_key(user_id)],
+        args=args
+    )
+
+
+async def record_task_created(user_id: str, task: dict) -> None:
+    deltas = {
+        f"status:{task['status']}": 1,
+        f"created:{_day(task['created_at'])}": 1
+    }
+    if task.get("completed_at"):
+        deltas[f"completed:{_day(task['completed_at'])}"] = 1
+    await _apply(user_id, deltas)
+
+
+async def record_task_updated(user_id: str, previous: dict, task: dict) -> None:
+    old_status = _status(previous["status"])
+    if old_status == task["status"]:
+        # status degismediyse sayaclar da degismez, gen'i yine de artir
+        await _apply(user_id, {})
+        return
+
+    deltas = {f"status:{old_status}": -1, f"status:{task['status']}": 1}
+    if previous.get("completed_at") and not task.get("completed_at"):
+        deltas[f"completed:{_day(previous['completed_at'])}"] = -1
+    if task.get("completed_at") and not previous.get("completed_at"):
+        deltas[f"completed:{_day(task['completed_at'])}"] = 1
+    await _apply(user_id, deltas)
+
+
+async def record_task_deleted(user_id: str, previous: dict) -> None:
+    deltas = {
+        f"status:{_status(previous['status'])}": -1,
+        f"created:{_day(previous['created_at'])}": -1
+    }
+    if previous.get("completed_at"):
+        deltas[f"completed:{_day(previous['completed_at'])}"] = -1
+    await _apply(user_id, deltas)
+
+
+async def invalidate_stats(user_id: str) -> None:
+    # toplu islemlerde tek tek saymak yerine sil, bi sonraki okuma mongo'dan kurar
+    redis = get_redis()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.incr(get_stats_generation_key(user_id))
+        pipe.expire(get_stats_generation_key(user_id), GENERATION_TTL)
+        pipe.delete(get_stats_key(user_id))
+        await pipe.execute()
+
+
+async def aggregate_stats(user_id: str) -> dict[str, int]:
+    # tamir yolu: sayaclari mongo'dan bastan hesapla
+    since = datetime.utcnow() - timedelta(days=settings.stats_max_days)
+    per_day = lambda field: [  # noqa: E731
+        {"$match": {field: {"$gte": since}}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${field}"}}, "count": {"$sum": 1}}}
+    ]
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$facet": {
+            "status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "created": per_day("created_at"),
+            "completed": per_day("completed_at")
+        }}
+    ]
+    result = (await Task.get_motor_collection().aggregate(pipeline).to_list(None))[0]
+
+    counters = {}
+    for facet in ("status", "created", "completed"):
+        for row in result[facet]:
+            counters[f"{facet}:{_status(row['_id'])}"] = row["count"]
+    return counters
+
+
+async def load_counters(user_id: str) -> dict[str, int]:
+    redis = get_redis()
+    cached = await redis.hgetall(get_stats_key(user_id))
+    if cached:
+        cached.pop(BUILT_FIELD, None)
+        return {field: int(value) for field, value in cached.items()}
+
+    generation = await redis.get(get_stats_generation_key(user_id))
+    counters = await aggregate_stats(user_id)
+
+    args = [generation or "", settings.stats_ttl, BUILT_FIELD, 1]
+    for field, value in counters.items():
+        args.extend([field, value])
+    await _script(REBUILD_SCRIPT)(
+        keys=[get_stats_key(user_id), get_stats_generation_key(user_id)],
+        args=args
+    )
+    return counters
+
+
+async def get_task_stats(user_id: str, days: int) -> dict:
+    counters = await load_counters(user_id)
+
+    by_status = {status.value: max(0, counters.get(f"status:{status.value}", 0)) for status in TaskStatus}
+
+    today = datetime.utcnow().date()
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        daily.append({
+            "date": day,
+            "created": max(0, counters.get(f"created:{day}", 0)),
+            "completed": max(0, counters.get(f"completed:{day}", 0))
+        })
+
+    return {
+        "by_status": by_status,
+        "total": sum(by_status.values()),
+        "days": daily
+    }
@@ -0,0 +1,524 @@
+import asyncio
+import base64
+import json
+import re
+import unicodedata
+from datetime import datetime
+from typing import AsyncIterator, Tuple
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import ASCENDING, DESCENDING, UpdateOne, ReturnDocument
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.models.task import Task, TaskStatus
+from app.schemas import TaskCreate, TaskBulkUpdate
+
+settings = get_settings()
+
+SORT_FIELDS = ("updated_at", "created_at")
+
+# document_to_dict'in kullandigi alanlar, fazlasini cekmiyoruz
+TASK_PROJECTION = {
+    "user_id": 1,
+    "title": 1,
+    "description": 1,
+    "status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "completed_at": 1,
+    "version": 1
+}
+
+# sayfali liste okumalari secondary'lere gidebilir, biraz gecikmeli olmasi sorun degil
+LIST_READ_PREFERENCE = make_read_preference(
+    read_pref_mode_from_name(settings.mongodb_list_read_preference), None
+)
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def utcnow_ms() -> datetime:
+    # mongo milisaniyeye yuvarliyo, cache'e/response'a giden zaman kaydedilenle ayni olsun
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def tokenize(text: str | None) -> list[str]:
+    # kucuk harf + aksanlari at ("Görev" -> "gorev"), tek harfli kelimeler index'e girmiyo
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKD", text.casefold())
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+    words = []
+    seen = set()
+    for word in WORD_PATTERN.findall(normalized):
+        if len(word) >= settings.search_min_term_length and word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words[:settings.search_max_terms]
+
+
+def search_fields(title: str, description: str | None) -> dict:
+    title_terms = tokenize(title)
+    description_terms = tokenize(description)
+    return {
+        "title_terms": title_terms,
+        "description_terms": description_terms,
+        "search_terms": sorted(set(title_terms) | set(description_terms))
+    }
+
+
+def task_to_dict(task: Task) -> dict:
+    return {
+        "id": str(task.id),
+        "user_id": task.user_id,
+        "title": task.title,
+        "description": task.description,
+        "status": task.status.value,
+        "created_at": task.created_at.isoformat(),
+        "updated_at": task.updated_at.isoformat(),
+        "completed_at": task.completed_at.isoformat() if task.completed_at else None,
+        "version": task.version
+    }
+
+
+def document_to_dict(doc: dict) -> dict:
+    # motor'dan gelen ham dokuman, Task modeli kurmadan
+    return {
+        "id": str(doc["_id"]),
+        "user_id": doc["user_id"],
+        "title": doc["title"],
+        "description": doc.get("description"),
+        "status": doc["status"],
+        "created_at": doc["created_at"].isoformat(),
+        "updated_at": doc["updated_at"].isoformat(),
+        "completed_at": doc["completed_at"].isoformat() if doc.get("completed_at") else None,
+        "version": doc.get("version", 0)
+    }
+
+
+def new_task_document(user_id: str, data: TaskCreate, now: datetime) -> dict:
+    # insert_many icin ham dokuman, Task modelinin kaydettigi sekilde
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "title": data.title,
+        "description": data.description,
+        "status": data.status,
+        "created_at": now,
+        "updated_at": now,
+        "completed_at": now if data.status == TaskStatus.DONE.value else None,
+        "version": 0,
+        **search_fields(data.title, data.description)
+    }
+
+
+async def iter_task_batches(
+    user_id: str,
+    batch_size: int | None = None,
+    updated_since: datetime | None = None
+) -> AsyncIterator[list[dict]]:
+    # beanie Task kurmadan, ham dokumanlari batch batch dict'e ceviriyo
+    # state management'li Task her dokumanin bi kopyasini daha tutuyo, buyuk listelerde pahali
+    batch_size = batch_size or settings.mongodb_batch_size
+    query: dict = {"user_id": user_id}
+    if updated_since:
+        query["updated_at"] = {"$gte": updated_since}
+
+    cursor = Task.get_motor_collection().find(
+        query,
+        TASK_PROJECTION,
+        batch_size=batch_size
+    )
+    if updated_since:
+        # artimli senkron icin eskiden yeniye, (user_id, updated_at) index'inden
+        cursor = cursor.sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+
+    batch = []
+    async for doc in cursor:
+        batch.append(document_to_dict(doc))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def load_task_dicts(user_id: str) -> list[dict]:
+    tasks = []
+    async for batch in iter_task_batches(user_id):
+        tasks.extend(batch)
+    return tasks
+
+
+def _version_filter(version: int) -> dict | int:
+    # version alani olmayan eski dokumanlar 0 sayiliyo
+    if version == 0:
+        return {"$in": [0, None]}
+    return version
+
+
+def _completed_at_expression(status: str | None, now: datetime):
+    # done'a gecince simdi, zaten done ise eskisi kalsin, done'dan cikinca None
+    if status is None:
+        return "$completed_at"
+    if status != TaskStatus.DONE.value:
+        return None
+    return {"$cond": [{"$eq": ["$status", TaskStatus.DONE.value]}, "$completed_at", now]}
+
+
+def _apply_completed_at(previous: dict, status: str | None, now: datetime) -> datetime | None:
+    # _completed_at_expression'in python karsiligi, BEFORE dokumandan yeni hali kurmak icin
+    if status is None:
+        return previous.get("completed_at")
+    if status != TaskStatus.DONE.value:
+        return None
+    return previous.get("completed_at") if previous["status"] == TaskStatus.DONE.value else now
+
+
+def update_pipeline(changes: dict) -> list[dict]:
+    # pipeline update: completed_at eski status'a gore ayni islemde hesaplaniyo
+    # kullanici degerleri $literal, "$..." ile baslayan title alan referansi sanilmasin
+    now = changes["updated_at"]
+    terms = {}
+    if "title" in changes:
+        terms["title_terms"] = {"$literal": tokenize(changes["title"])}
+    if "description" in changes:
+        terms["description_terms"] = {"$literal": tokenize(changes["description"])}
+
+    pipeline = [{"$set": {
+        "completed_at": _completed_at_expression(changes.get("status"), now),
+        **{field: {"$literal": value} for field, value in changes.items()},
+        **terms,
+        "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+    }}]
+    if terms:
+        # sadece biri degistiyse digerinin kelimeleri dokumandan, okumadan birlesim
+        pipeline.append({"$set": {"search_terms": {"$setUnion": [
+            {"$ifNull": ["$title_terms", []]},
+            {"$ifNull": ["$description_terms", []]}
+        ]}}})
+    return pipeline
+
+
+async def update_task_fields(
+    user_id: str,
+    object_id: ObjectId,
+    changes: dict,
+    expected_version: int | None = None
+) -> Tuple[dict, dict] | None:
+    # tek round trip, None donerse hicbir sey degismedi
+    # eski hali donuyoruz (istatistikler icin eski status lazim), yeni hali ondan kuruyoruz
+    query = {"_id": object_id, "user_id": user_id}
+    if expected_version is not None:
+        query["version"] = _version_filter(expected_version)
+
+    # mongo milisaniyeye yuvarliyo, donen completed_at/updated_at kaydedilenle ayni olsun
+    now = changes["updated_at"]
+    changes = {**changes, "updated_at": now.replace(microsecond=now.microsecond // 1000 * 1000)}
+
+    previous = await Task.get_motor_collection().find_one_and_update(
+        query,
+        update_pipeline(changes),
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        return None
+
+    current = {
+        **previous,
+        **changes,
+        "completed_at": _apply_completed_at(previous, changes.get("status"), changes["updated_at"]),
+        "version": (previous.get("version") or 0) + 1
+    }
+    return document_to_dict(current), previous
+
+
+async def delete_task_document(
+    user_id: str,
+    object_id: ObjectId,
+    expected_version: int | None = None
+) -> dict | None:
+    # silinen dokumani donuyo, istatistikleri dusmek icin
+    query = {"_id": object_id, "user_id": user_id}
+    if expected_version is not None:
+        query["version"] = _version_filter(expected_version)
+
+    return await Task.get_motor_collection().find_one_and_delete(
+        query,
+        projection={"status": 1, "created_at": 1, "completed_at": 1}
+    )
+
+
+async def get_write_failure_status(user_id: str, object_id: ObjectId) -> int:
+    # sadece yazma basarisiz olunca: yok mu, baskasinin mi, version mi tutmadi
+    doc = await Task.get_motor_collection().find_one({"_id": object_id}, {"user_id": 1})
+    if doc is None:
+        return 404
+    if doc["user_id"] != user_id:
+        return 403
+    return 412
+
+
+def parse_sort(sort: str) -> Tuple[str, int]:
+    # "-updated_at" -> (updated_at, desc)
+    if sort.startswith("-"):
+        return sort[1:], DESCENDING
+    return sort, ASCENDING
+
+
+def encode_cursor(doc: dict, sort: str) -> str:
+    # sort da cursor'da, baska sort'la gelen cursor yanlis yerden devam etmesin
+    sort_field, _ = parse_sort(sort)
+    value = doc[sort_field]
+    raw = json.dumps([sort, value.isoformat(), str(doc["_id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = datetime.fromisoformat(value), ObjectId(task_id)
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+    if cursor_sort != sort:
+        raise InvalidCursorError("Cursor was created with a different sort")
+    return value, last_id
+
+
+async def find_tasks_page(
+    user_id: str,
+    limit: int,
+    after: str | None = None,
+    status: str | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+    sort: str = "-updated_at"
+) -> Tuple[list[dict], str | None]:
+    sort_field, direction = parse_sort(sort)
+
+    query: dict = {"user_id": user_id}
+
+    if status:
+        query["status"] = status
+
+    updated_range = {}
+    if updated_after:
+        updated_range["$gte"] = updated_after
+    if updated_before:
+        updated_range["$lt"] = updated_before
+    if updated_range:
+        query["updated_at"] = updated_range
+
+    if after:
+        value, last_id = decode_cursor(after, sort)
+        op = "$lt" if direction == DESCENDING else "$gt"
+        bound = "$lte" if direction == DESCENDING else "$gte"
+
+        # keyset: (sort_field, _id) ikilisinden sonrasi
+        # ayri bir range koyuyoruz ki index scan cursor noktasindan baslasin
+        range_filter = dict(query.get(sort_field, {}))
+        # updated_at artan sirada updated_after da $gte, hangisi daha darsa o kalsin
+        if bound in range_filter:
+            pick = max if bound == "$gte" else min
+            range_filter[bound] = pick(range_filter[bound], value)
+        else:
+            range_filter[bound] = value
+        query[sort_field] = range_filter
+        query["$or"] = [
+            {sort_field: {op: value}},
+            {sort_field: value, "_id": {op: last_id}}
+        ]
+
+    collection = Task.get_motor_collection().with_options(read_preference=LIST_READ_PREFERENCE)
+    docs = await collection.find(query, TASK_PROJECTION).sort(
+        [(sort_field, direction), ("_id", direction)]
+    ).limit(limit + 1).to_list(None)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort)
+
+    return [document_to_dict(doc) for doc in docs], next_cursor
+
+
+def validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+def _parse_object_id(task_id: str) -> ObjectId | None:
+    try:
+        return ObjectId(task_id)
+    except Exception:
+        return None
+
+
+def write_errors_by_index(error: BulkWriteError) -> dict[int, str]:
+    return {
+        write_error["index"]: write_error.get("errmsg", "Write failed")
+        for write_error in error.details.get("writeErrors", [])
+    }
+
+
+async def get_task_owners(object_ids: list[ObjectId]) -> dict[ObjectId, str]:
+    # tek sorguda hangi task kimin
+    cursor = Task.get_motor_collection().find(
+        {"_id": {"$in": list(set(object_ids))}},
+        {"user_id": 1}
+    )
+    return {doc["_id"]: doc["user_id"] async for doc in cursor}
+
+
+async def bulk_create_tasks(user_id: str, items: list[dict]) -> list[dict]:
+    results = []
+    tasks = []
+    positions = []
+    now = utcnow_ms()
+
+    for index, item in enumerate(items):
+        try:
+            data = TaskCreate.model_validate(item)
+        except ValidationError as e:
+            results.append({"index": index, "status": 422, "error": validation_message(e)})
+            continue
+
+        # id'yi burda veriyoruz ki insert_many hata verse de hangisi yazildi bilelim
+        tasks.append(Task(
+            id=ObjectId(),
+            user_id=user_id,
+            title=data.title,
+            description=data.description,
+            status=TaskStatus(data.status),
+            created_at=now,
+            updated_at=now,
+            completed_at=now if data.status == TaskStatus.DONE.value else None,
+            **search_fields(data.title, data.description)
+        ))
+        positions.append(index)
+
+    failed = {}
+    if tasks:
+        try:
+            await Task.insert_many(tasks, ordered=False)
+        except BulkWriteError as e:
+            failed = write_errors_by_index(e)
+
+    for i, task in enumerate(tasks):
+        if i in failed:
+            results.append({"index": positions[i], "id": str(task.id), "status": 500, "error": failed[i]})
+        else:
+            results.append({"index": positions[i], "id": str(task.id), "status": 201, "task": task_to_dict(task)})
+
+    return sorted(results, key=lambda result: result["index"])
+
+
+async def bulk_update_tasks(user_id: str, items: list[dict]) -> list[dict]:
+    results = []
+    parsed = []
+
+    for index, item in enumerate(items):
+        try:
+            data = TaskBulkUpdate.model_validate(item)
+        except ValidationError as e:
+            results.append({"index": index, "status": 422, "error": validation_message(e)})
+            continue
+
+        object_id = _parse_object_id(data.id)
+        if object_id is None:
+            results.append({"index": index, "id": data.id, "status": 400, "error": "Invalid task ID format"})
+            continue
+
+        parsed.append((index, object_id, data.model_dump(exclude_unset=True, exclude={"id"})))
+
+    owners = await get_task_owners([object_id for _, object_id, _ in parsed]) if parsed else {}
+
+    now = datetime.utcnow()
+    operations = []
+    pending = []
+    for index, object_id, changes in parsed:
+        owner = owners.get(object_id)
+        if owner is None:
+            results.append({"index": index, "id": str(object_id), "status": 404, "error": "Task not found"})
+        elif owner != user_id:
+            results.append({"index": index, "id": str(object_id), "status": 403, "error": "Not authorized to update this task"})
+        else:
+            changes["updated_at"] = now
+            operations.append(UpdateOne(
+                {"_id": object_id, "user_id": user_id},
+                update_pipeline(changes)
+            ))
+            pending.append((index, object_id))
+
+    failed = {}
+    updated = {}
+    if operations:
+        try:
+            await Task.get_motor_collection().bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            failed = write_errors_by_index(e)
+
+        updated_ids = [object_id for i, (_, object_id) in enumerate(pending) if i not in failed]
+        if updated_ids:
+            cursor = Task.get_motor_collection().find({"_id": {"$in": updated_ids}}, TASK_PROJECTION)
+            updated = {doc["_id"]: document_to_dict(doc) async for doc in cursor}
+
+    for i, (index, object_id) in enumerate(pending):
+        if i in failed:
+            results.append({"index": index, "id": str(object_id), "status": 500, "error": failed[i]})
+        elif object_id not in updated:
+            # arada silinmis
+            results.append({"index": index, "id": str(object_id), "status": 404, "error": "Task not found"})
+        else:
+            results.append({"index": index, "id": str(object_id), "status": 200, "task": updated[object_id]})
+
+    return sorted(results, key=lambda result: result["index"])
+
+
+async def bulk_delete_tasks(user_id: str, task_ids: list[str]) -> list[dict]:
+    results = []
+    parsed = []
+    seen = set()
+
+    for index, task_id in enumerate(task_ids):
+        object_id = _parse_object_id(task_id)
+        if object_id is None:
+            results.append({"index": index, "id": task_id, "status": 400, "error": "Invalid task ID format"})
+        elif object_id in seen:
+            # ayni task iki kere silinmis sayilmasin, iki event gitmesin
+            results.append({"index": index, "id": str(object_id), "status": 400, "error": "Duplicate task ID"})
+        else:
+            seen.add(object_id)
+            parsed.append((index, object_id))
+
+    # delete_many sadece sayi donuyo, hangisini bizim sildigimizi bilmek icin task basina find_one_and_delete
+    # hepsi ayni anda gidiyo; arada baskasi sildiyse o bizde 404 olur
+    collection = Task.get_motor_collection()
+    deleted = await asyncio.gather(*(
+        collection.find_one_and_delete({"_id": object_id, "user_id": user_id}, projection={"_id": 1})
+        for _, object_id in parsed
+    ))
+
+    missing = [object_id for (_, object_id), doc in zip(parsed, deleted) if doc is None]
+    owners = await get_task_owners(missing) if missing else {}
+
+    for (index, object_id), doc in zip(parsed, deleted):
+        owner = owners.get(object_id)
+        if doc is not None:
+            results.append({"index": index, "id": str(object_id), "status": 204})
+        elif owner is None:
+            results.append({"index": index, "id": str(object_id), "status": 404, "error": "Task not found"})
+        else:
+            results.append({"index": index, "id": str(object_id), "status": 403, "error": "Not authorized to delete this task"})
+
+    return sorted(results, key=lambda result: result["index"])
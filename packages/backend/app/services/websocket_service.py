@@ -1,51 +1,258 @@
+import asyncio
+import time
 import socketio
+from urllib.parse import parse_qs
+from engineio import packet as engineio_packet
 from typing import Optional
-from app.services.auth_service import decode_access_token
+from app.client_ip import resolve_client_ip
+from app.config import get_settings
+from app.database import get_redis
+from app.services.auth_service import (
+    USER_DELETED,
+    decode_access_token_cached,
+    get_revocation_state,
+    is_token_revoked,
+    get_token_cache_stats
+)
+from app.serialization import SocketIOJSON, dumps_str, loads
+from app.metrics import socketio_clients, socketio_events, bound
+
+settings = get_settings()
+
+# cluster modda emit'ler redis uzerinden diger worker/node'lara da gidiyo
+client_manager = None
+if settings.ws_cluster_mode:
+    client_manager = socketio.AsyncRedisManager(
+        f"redis://{settings.redis_host}:{settings.redis_port}/0"
+    )
 
 sio = socketio.AsyncServer(
     async_mode="asgi",
-    cors_allowed_origins="*"
+    cors_allowed_origins="*",
+    json=SocketIOJSON,
+    client_manager=client_manager
 )
 
-# hangi user hangi socketlere bagli
+# hangi user hangi socketlere bagli (sadece bu process)
 user_connections: dict[str, set[str]] = {}
 
+_heartbeat_task: asyncio.Task | None = None
 
-@sio.event
-async def connect(sid: str, environ: dict, auth: Optional[dict] = None):
-    token = None
-    
-    if auth and "token" in auth:
-        token = auth["token"]
-    else:
-        # query stringden almaya calis
-        query_string = environ.get("QUERY_STRING", "")
-        params = dict(param.split("=") for param in query_string.split("&") if "=" in param)
-        token = params.get("token")
+# giden event'ler: route'lar kuyruga atar, pipeline oda basina toplayip gonderir
+_event_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_queue_max)
+_pipeline_task: asyncio.Task | None = None
+# event'lere user basina artan seq veriyo ve redis stream'e yaziyo, atomik olmasi lazim
+# yoksa iki worker'in xadd'leri sira disi kalabilir
+RECORD_EVENTS_SCRIPT = """
+local count = #ARGV - 2
+local first = redis.call('INCRBY', KEYS[1], count) - count + 1
+for i = 3, #ARGV do
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[1], (first + i - 3) .. '-0', 'data', ARGV[i])
+end
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return first
+"""
+_record_script = None
+
+handshake_stats = {
+    "accepted": 0,
+    "rejected": {},
+    "avg_ms": 0.0,
+    "max_ms": 0.0
+}
+
+pipeline_stats = {
+    "batches": 0,
+    "coalesced": 0,
+    "dropped": 0,
+    "slow_drops": 0,
+    "slow_disconnects": 0
+}
+
+
+def get_seq_key(user_id: str) -> str:
+    return f"ws:seq:{user_id}"
+
+
+def get_stream_key(user_id: str) -> str:
+    return f"ws:events:{user_id}"
+
+
+def get_registry_key(user_id: str) -> str:
+    # sorted set: sid -> son gecerli an, heartbeat gelmezse dusuyo
+    return f"ws:user:{user_id}"
+
+
+async def register_connection(user_id: str, sid: str) -> None:
+    if not settings.ws_cluster_mode:
+        return
+    key = get_registry_key(user_id)
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.zadd(key, {sid: time.time() + settings.ws_registry_ttl})
+        pipe.expire(key, settings.ws_registry_ttl)
+        await pipe.execute()
+
+
+async def unregister_connection(user_id: str, sid: str) -> None:
+    if not settings.ws_cluster_mode:
+        return
+    await get_redis().zrem(get_registry_key(user_id), sid)
+
+
+async def has_live_connections(user_id: str) -> bool:
+    if not settings.ws_cluster_mode:
+        return user_id in user_connections
+    # cluster genelinde canli socket var mi, yoksa emit'i hic yapmiyoruz
+    return await get_redis().zcount(get_registry_key(user_id), time.time(), "+inf") > 0
+
+
+async def _heartbeat_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.ws_heartbeat_interval)
+        try:
+            now = time.time()
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for user_id, sids in list(user_connections.items()):
+                    key = get_registry_key(user_id)
+                    pipe.zadd(key, {sid: now + settings.ws_registry_ttl for sid in sids})
+                    pipe.zremrangebyscore(key, "-inf", now)
+                    pipe.expire(key, settings.ws_registry_ttl)
+                await pipe.execute()
+        except Exception as e:
+            print(f"[WS] Heartbeat error: {e}")
+
+
+async def start_ws_registry() -> None:
+    global _heartbeat_task
+    if settings.ws_cluster_mode and _heartbeat_task is None:
+        _heartbeat_task = asyncio.create_task(_heartbeat_loop())
+
+
+async def stop_ws_registry() -> None:
+    global _heartbeat_task
+    if _heartbeat_task:
+        _heartbeat_task.cancel()
+        try:
+            await _heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        _heartbeat_task = None
+
+    # bu process'in socketlerini registry'den temizle
+    if settings.ws_cluster_mode and user_connections:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for user_id, sids in user_connections.items():
+                pipe.zrem(get_registry_key(user_id), *sids)
+            await pipe.execute()
+
+
+def _get_client_ip(environ: dict) -> str:
+    # nginx arkasinda gercek ip X-Real-IP'de, ama sadece nginx'ten geldiyse
+    return resolve_client_ip(
+        environ.get("REMOTE_ADDR"),
+        environ.get("HTTP_X_REAL_IP"),
+        environ.get("HTTP_X_FORWARDED_FOR")
+    )
+
+
+def _get_token(environ: dict, auth: Optional[dict]) -> str | None:
+    if auth and auth.get("token"):
+        return auth["token"]
+    # query stringden almaya calis, url-decode dahil
+    params = parse_qs(environ.get("QUERY_STRING", ""))
+    values = params.get("token")
+    return values[0] if values else None
+
+
+async def _connect_count(key: str) -> int:
+    # sabit pencere sayaci, tum worker'lar ortak
+    window = int(time.time()) // settings.ws_connect_window
+    key = f"{key}:{window}"
+
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.incr(key)
+        pipe.expire(key, settings.ws_connect_window * 2)
+        count, _ = await pipe.execute()
+    return count
+
+
+async def _authenticate(environ: dict, auth: Optional[dict]) -> tuple[str | None, str | None]:
+    # (user_id, red sebebi)
+    # ip limiti token'dan once: gecersiz token'li handshake firtinasi da sayilsin, jwt.decode'a gelmeden kesilsin
+    if await _connect_count(f"ws:connect:ip:{_get_client_ip(environ)}") > settings.ws_connect_max_per_ip:
+        return None, "rate_limited_ip"
     
+    token = _get_token(environ, auth)
     if not token:
-        print(f"[WS] No token: {sid}")
-        return False
+        return None, "no_token"
     
-    payload = decode_access_token(token)
+    payload = decode_access_token_cached(token)
     if not payload:
-        print(f"[WS] Invalid token: {sid}")
-        return False
+        return None, "invalid_token"
     
     user_id = payload.get("sub")
     if not user_id:
-        print(f"[WS] No user_id: {sid}")
+        return None, "no_user_id"
+    
+    if await _connect_count(f"ws:connect:user:{user_id}") > settings.ws_connect_max_per_user:
+        return None, "rate_limited_user"
+    
+    generation = await get_revocation_state(user_id)
+    if generation == USER_DELETED:
+        return None, "user_deleted"
+    if is_token_revoked(payload, generation):
+        return None, "revoked_token"
+    
+    return user_id, None
+
+
+def _record_handshake(started: float, reason: str | None) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    # ewma
+    handshake_stats["avg_ms"] += 0.1 * (elapsed_ms - handshake_stats["avg_ms"])
+    handshake_stats["max_ms"] = max(handshake_stats["max_ms"], elapsed_ms)
+    if reason is None:
+        handshake_stats["accepted"] += 1
+    else:
+        rejected = handshake_stats["rejected"]
+        rejected[reason] = rejected.get(reason, 0) + 1
+
+
+@sio.event
+async def connect(sid: str, environ: dict, auth: Optional[dict] = None):
+    started = time.perf_counter()
+    
+    try:
+        user_id, reason = await _authenticate(environ, auth)
+    except Exception as e:
+        print(f"[WS] Handshake error: {e}")
+        user_id, reason = None, "error"
+    
+    if user_id is None:
+        _record_handshake(started, reason)
+        print(f"[WS] Rejected ({reason}): {sid}")
         return False
     
     if user_id not in user_connections:
         user_connections[user_id] = set()
     user_connections[user_id].add(sid)
+    await register_connection(user_id, sid)
     
     await sio.enter_room(sid, f"user:{user_id}")
     
     async with sio.session(sid) as session:
         session["user_id"] = user_id
     
+    # hic event almamis client da bi seq'ten baslasin, reconnect'te resume edebilsin
+    # room'a girdikten sonra okunuyo, bundan sonraki event'ler hep daha buyuk seq'li
+    try:
+        current = int(await get_redis().get(get_seq_key(user_id)) or 0)
+        await sio.emit("task:seq", {"seq": current}, to=sid)
+    except Exception as e:
+        print(f"[WS] Seq send failed: {e}")
+    
+    _record_handshake(started, None)
+    socketio_clients.inc()
     print(f"[WS] Connected: {user_id}")
     return True
 
@@ -55,33 +262,266 @@ async def disconnect(sid: str):
     async with sio.session(sid) as session:
         user_id = session.get("user_id")
     
+    if user_id:
+        socketio_clients.dec()
+    
     if user_id and user_id in user_connections:
         user_connections[user_id].discard(sid)
         if not user_connections[user_id]:
             del user_connections[user_id]
+        await unregister_connection(user_id, sid)
     
     print(f"[WS] Disconnected: {sid}")
 
 
-async def emit_task_event(user_id: str, event_type: str, task_id: str):
-    import time
+@sio.on("task:resume")
+async def resume(sid: str, data: Optional[dict] = None):
+    # client son gordugu seq'i gonderiyo, aradakileri ack ile donuyoruz
+    async with sio.session(sid) as session:
+        user_id = session.get("user_id")
+    if not user_id:
+        return {"resync": True, "seq": 0}
+    
+    try:
+        last_seq = int((data or {}).get("lastSeq", 0))
+    except (TypeError, ValueError):
+        last_seq = 0
+    
+    redis = get_redis()
+    current = int(await redis.get(get_seq_key(user_id)) or 0)
+    
+    if last_seq == current:
+        return {"resync": False, "seq": current, "events": []}
+    
+    # cok geride ya da seq bilinmiyo: tam liste cekmesi lazim
+    if last_seq <= 0 or last_seq > current or current - last_seq > settings.ws_resume_max:
+        return {"resync": True, "seq": current}
     
+    entries = await redis.xrange(get_stream_key(user_id), min=f"{last_seq + 1}-0", max="+")
+    
+    # stream kirpilmis, aradakiler yok
+    if not entries or int(entries[0][0].split("-")[0]) != last_seq + 1:
+        return {"resync": True, "seq": current}
+    
+    events = [
+        {**loads(fields["data"]), "seq": int(entry_id.split("-")[0])}
+        for entry_id, fields in entries
+    ]
+    # arada toplu islem/import var, payload'u saklanmadi
+    if any(event.get("resync") for event in events):
+        return {"resync": True, "seq": current}
+    return {"resync": False, "seq": events[-1]["seq"], "events": events}
+
+
+def _coalesce(pending: dict[str, dict], event: dict) -> None:
+    # ayni task icin birikmis event'lerden sadece sonuncusu gider
+    task_id = event.get("taskId")
+    if task_id is None:
+        # toplu event'ler birlestirilmiyo
+        pending[f"bulk:{len(pending)}"] = event
+        return
+
+    previous = pending.pop(task_id, None)
+    if previous is not None:
+        pipeline_stats["coalesced"] += 1
+        # created + updated hala client icin "created"
+        if previous["type"] == "task.created" and event["type"] == "task.updated":
+            event = {**event, "type": "task.created"}
+    pending[task_id] = event
+
+
+def _enqueue(user_id: str, event: dict) -> None:
+    bound(socketio_events, event["type"]).inc()
+    try:
+        _event_queue.put_nowait((user_id, event))
+    except asyncio.QueueFull:
+        pipeline_stats["dropped"] += 1
+
+
+def _apply_backpressure(user_id: str) -> None:
+    # bu process'teki yavas socketler: engineio gonderim kuyrugu cok sisdiyse
+    for sid in list(user_connections.get(user_id, ())):
+        try:
+            eio_sid = sio.manager.eio_sid_from_sid(sid, "/")
+            eio_socket = sio.eio.sockets.get(eio_sid)
+        except Exception:
+            continue
+        queue = getattr(eio_socket, "queue", None)
+        if queue is None or queue.qsize() < settings.ws_send_buffer_max:
+            continue
+
+        if settings.ws_slow_consumer_policy == "disconnect":
+            pipeline_stats["slow_disconnects"] += 1
+            asyncio.create_task(sio.disconnect(sid))
+            continue
+
+        # drop_oldest: en eski mesaj paketlerini at, ping/noop vs. kalsin
+        packets = []
+        while not queue.empty():
+            packets.append(queue.get_nowait())
+            queue.task_done()
+        excess = len(packets) - settings.ws_send_buffer_max + 1
+        for pkt in packets:
+            if excess > 0 and pkt is not None and pkt.packet_type == engineio_packet.MESSAGE:
+                excess -= 1
+                pipeline_stats["slow_drops"] += 1
+                continue
+            queue.put_nowait(pkt)
+
+
+def _stream_entry(event: dict) -> str:
+    # toplu event'te 1000'e kadar tam task olabilir, stream'de sadece sayiyla sinirli, redis'i sisirmesin
+    # payload'suz yaziliyo, resume bunu gorunce client'a tam liste cektiriyo
+    if "taskId" not in event:
+        return dumps_str({"type": event["type"], "timestamp": event["timestamp"], "resync": True})
+    return dumps_str(event)
+
+
+async def _record_events(user_id: str, batch: list[dict]) -> None:
+    global _record_script
+    redis = get_redis()
+    if _record_script is None or _record_script.registered_client is not redis:
+        _record_script = redis.register_script(RECORD_EVENTS_SCRIPT)
+
+    first = await _record_script(
+        keys=[get_seq_key(user_id), get_stream_key(user_id)],
+        args=[settings.ws_event_retention, settings.ws_event_ttl, *[_stream_entry(event) for event in batch]]
+    )
+    for offset, event in enumerate(batch):
+        event["seq"] = first + offset
+
+
+async def _flush(pending: dict[str, dict[str, dict]]) -> None:
+    for user_id, events in pending.items():
+        batch = list(events.values())
+
+        # client o an bagli olmasa da stream'e yaziyoruz, geri gelince kacirdiklarini alsin
+        # redis yazamazsa event yine gider, sadece seq'siz
+        try:
+            await _record_events(user_id, batch)
+        except Exception as e:
+            print(f"[WS] Event record error: {e}")
+
+        if not await has_live_connections(user_id):
+            continue
+
+        _apply_backpressure(user_id)
+
+        room = f"user:{user_id}"
+        # tek event'se eski format, client'lar aynen calissin
+        if len(batch) == 1:
+            await sio.emit("task:update", batch[0], room=room)
+        else:
+            await sio.emit("task:batch", {"events": batch}, room=room)
+        pipeline_stats["batches"] += 1
+
+
+async def _pipeline_loop() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        user_id, event = await _event_queue.get()
+        pending: dict[str, dict[str, dict]] = {}
+        _coalesce(pending.setdefault(user_id, {}), event)
+
+        # ilk event'ten sonra N ms ya da M event bekle, sonra topluca gonder
+        deadline = loop.time() + settings.ws_flush_interval_ms / 1000
+        count = 1
+        while count < settings.ws_flush_max_events:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                user_id, event = await asyncio.wait_for(_event_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            _coalesce(pending.setdefault(user_id, {}), event)
+            count += 1
+
+        try:
+            await _flush(pending)
+        except Exception as e:
+            print(f"[WS] Flush error: {e}")
+
+
+async def start_event_pipeline() -> None:
+    global _pipeline_task
+    if _pipeline_task is None:
+        _pipeline_task = asyncio.create_task(_pipeline_loop())
+
+
+async def stop_event_pipeline() -> None:
+    global _pipeline_task
+    if _pipeline_task:
+        _pipeline_task.cancel()
+        try:
+            await _pipeline_task
+        except asyncio.CancelledError:
+            pass
+        _pipeline_task = None
+
+
+def get_ws_stats() -> dict:
+    return {
+        "local_users": len(user_connections),
+        "local_sockets": sum(len(sids) for sids in user_connections.values()),
+        "queue_depth": _event_queue.qsize(),
+        **pipeline_stats,
+        "handshake": {
+            **handshake_stats,
+            "avg_ms": round(handshake_stats["avg_ms"], 3),
+            "max_ms": round(handshake_stats["max_ms"], 3),
+            "token_cache": get_token_cache_stats()
+        }
+    }
+
+
+async def emit_task_event(user_id: str, event_type: str, task_id: str, task: dict | None = None):
+    # http handler beklemesin, kuyruga at ve don
+    # task verisi de gidiyo, client listeyi yeniden cekmeden uyguluyo
     event_data = {
         "type": event_type,
         "taskId": task_id,
         "timestamp": int(time.time())
     }
+    if task is not None:
+        event_data["task"] = task
     
-    room = f"user:{user_id}"
-    await sio.emit("task:update", event_data, room=room)
+    _enqueue(user_id, event_data)
+
+
+async def emit_tasks_bulk(
+    user_id: str,
+    event_type: str,
+    task_ids: list[str],
+    tasks: list[dict] | None = None
+):
+    # toplu islemlerde tek event, tum id'ler icinde
+    event_data = {
+        "type": event_type,
+        "taskIds": task_ids,
+        "timestamp": int(time.time())
+    }
+    if tasks is not None:
+        event_data["tasks"] = tasks
+    
+    _enqueue(user_id, event_data)
+
+
+async def emit_tasks_imported(user_id: str, count: int):
+    # import'ta id listesi cok buyuk olabilir, sadece ozet; client listeyi yeniden ceker
+    _enqueue(user_id, {
+        "type": "tasks.imported",
+        "count": count,
+        "timestamp": int(time.time())
+    })
 
 
-async def emit_task_created(user_id: str, task_id: str):
-    await emit_task_event(user_id, "task.created", task_id)
+async def emit_task_created(user_id: str, task: dict):
+    await emit_task_event(user_id, "task.created", task["id"], task)
 
 
-async def emit_task_updated(user_id: str, task_id: str):
-    await emit_task_event(user_id, "task.updated", task_id)
+async def emit_task_updated(user_id: str, task: dict):
+    await emit_task_event(user_id, "task.updated", task["id"], task)
 
 
 async def emit_task_deleted(user_id: str, task_id: str):
@@ -0,0 +1,391 @@
+# REST + Socket.IO yuk testi: calisan bi backend'e karsi (docker-compose ya da lokal uvicorn)
+# Sentetik user'lar olusturur, task'leri /tasks/import ile yukler, karisik is yuku calistirir,
+# ayni anda N socket client ile event fan-out gecikmesini olcer. Sonunda user'lar silinir.
+#
+#   cd packages/backend
+#   pip install -r benchmarks/requirements.txt
+#   python benchmarks/bench_load.py --tasks-per-user 10,1000,100000 --duration 30 --output result.json
+#   python benchmarks/bench_load.py --compare result.json
+#
+# Backend sorgu sayilari /stats'tan okunuyo, /stats process basina: kesin sayilar icin tek worker calistir.
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+try:
+    import socketio
+except ImportError:
+    socketio = None
+
+PASSWORD = "bench-password-123"
+DEFAULT_MIX = "login=1,list=20,list_miss=3,create=5,update=5,delete=2"
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: list[float], errors: int, duration: float) -> dict:
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput": round(len(values) / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0
+    }
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight)
+    return weights
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, started: float) -> None:
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+
+    def fail(self, name: str) -> None:
+        self.errors[name] += 1
+
+
+class BenchUser:
+    def __init__(self, email: str, task_count: int):
+        self.email = email
+        self.task_count = task_count
+        self.token: str | None = None
+        self.task_ids: list[str] = []
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+async def post_retrying(client: httpx.AsyncClient, path: str, attempts: int = 10, **kwargs) -> httpx.Response:
+    # rate limit acikken register/login ip basina sinirli (POST /auth/register=5/60:ip), Retry-After kadar bekle
+    for _ in range(attempts - 1):
+        response = await client.post(path, **kwargs)
+        if response.status_code != 429:
+            return response
+        await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+    return await client.post(path, **kwargs)
+
+
+async def setup_user(client: httpx.AsyncClient, user: BenchUser) -> None:
+    await post_retrying(client, "/auth/register", json={"email": user.email, "password": PASSWORD})
+    response = await post_retrying(client, "/auth/login", json={"email": user.email, "password": PASSWORD})
+    response.raise_for_status()
+    user.token = response.json()["access_token"]
+
+    # task'leri tek tek degil import ile yukle
+    remaining = user.task_count
+    while remaining > 0:
+        size = min(remaining, 50000)
+        body = "\n".join(
+            json.dumps({"title": f"seed task {i}", "status": random.choice(["todo", "in_progress", "done"])})
+            for i in range(size)
+        )
+        response = await client.post(
+            "/tasks/import",
+            content=body.encode(),
+            headers={**user.headers, "Content-Type": "application/x-ndjson"},
+            timeout=300
+        )
+        response.raise_for_status()
+        remaining -= size
+
+    # update/delete icin id'ler, buyuk user'larda bi kismi yeter
+    response = await client.get("/tasks", params={"limit": 1000}, headers=user.headers)
+    response.raise_for_status()
+    user.task_ids = [task["id"] for task in response.json()["tasks"]]
+
+
+async def teardown_user(client: httpx.AsyncClient, user: BenchUser) -> None:
+    if user.token:
+        await client.delete("/auth/me", headers=user.headers, timeout=300)
+
+
+class FanoutTracker:
+    # write istegi basladiginda title -> t0, socket'e event gelince gecikme
+    def __init__(self):
+        self.sent: dict[str, float] = {}
+        self.samples: list[float] = []
+        self.received = 0
+
+    def expect(self, title: str) -> None:
+        self.sent[title] = time.perf_counter()
+
+    def on_event(self, event: dict) -> None:
+        self.received += 1
+        tasks = [event["task"]] if event.get("task") else event.get("tasks") or []
+        for task in tasks:
+            started = self.sent.get(task.get("title"))
+            if started is not None:
+                self.samples.append((time.perf_counter() - started) * 1000)
+
+
+async def connect_socket(base_url: str, user: BenchUser, tracker: FanoutTracker):
+    sio = socketio.AsyncClient(reconnection=False)
+
+    @sio.on("task:update")
+    async def on_update(event):
+        tracker.on_event(event)
+
+    @sio.on("task:batch")
+    async def on_batch(batch):
+        for event in batch["events"]:
+            tracker.on_event(event)
+
+    await sio.connect(base_url, auth={"token": user.token}, transports=["websocket"])
+    return sio
+
+
+async def run_operation(
+    name: str,
+    client: httpx.AsyncClient,
+    user: BenchUser,
+    recorder: Recorder,
+    tracker: FanoutTracker
+) -> None:
+    started = time.perf_counter()
+    label = None
+    try:
+        if name == "login":
+            response = await client.post("/auth/login", json={"email": user.email, "password": PASSWORD})
+
+        elif name == "list":
+            response = await client.get("/tasks", headers={**user.headers, "Accept-Encoding": "gzip"})
+            # hit/miss ayrimi backend'in X-Cache header'indan
+            label = f"list:{response.headers.get('X-Cache', '?')}"
+
+        elif name == "list_miss":
+            # toplu update cache'i komple siliyo, sonraki GET kesin MISS
+            if not user.task_ids:
+                return
+            await client.patch(
+                "/tasks/bulk",
+                json=[{"id": random.choice(user.task_ids), "status": "todo"}],
+                headers=user.headers
+            )
+            started = time.perf_counter()
+            response = await client.get("/tasks", headers={**user.headers, "Accept-Encoding": "gzip"})
+
+        elif name == "create":
+            title = f"bench {uuid.uuid4().hex}"
+            tracker.expect(title)
+            response = await client.post("/tasks", json={"title": title}, headers=user.headers)
+            if response.status_code == 201:
+                user.task_ids.append(response.json()["id"])
+
+        elif name == "update":
+            if not user.task_ids:
+                return
+            title = f"bench {uuid.uuid4().hex}"
+            tracker.expect(title)
+            response = await client.patch(
+                f"/tasks/{random.choice(user.task_ids)}",
+                json={"title": title, "status": random.choice(["todo", "in_progress", "done"])},
+                headers=user.headers
+            )
+
+        elif name == "delete":
+            if len(user.task_ids) <= 1:
+                return
+            task_id = user.task_ids.pop(random.randrange(len(user.task_ids)))
+            response = await client.delete(f"/tasks/{task_id}", headers=user.headers)
+
+        else:
+            raise ValueError(f"Unknown operation: {name}")
+
+        if response.status_code >= 400:
+            recorder.fail(name)
+            return
+        recorder.add(name, started)
+        if label:
+            recorder.add(label, started)
+    except httpx.HTTPError:
+        recorder.fail(name)
+
+
+async def worker(
+    deadline: float,
+    client: httpx.AsyncClient,
+    users: list[BenchUser],
+    weights: dict[str, int],
+    recorder: Recorder,
+    tracker: FanoutTracker
+) -> None:
+    names = list(weights)
+    counts = list(weights.values())
+    while time.perf_counter() < deadline:
+        name = random.choices(names, counts)[0]
+        await run_operation(name, client, random.choice(users), recorder, tracker)
+
+
+def stats_counts(stats: dict) -> dict:
+    # /stats'tan karsilastirilabilir sayaclar
+    commands = stats.get("mongodb", {}).get("commands", {})
+    return {
+        "mongodb": {name: values["count"] for name, values in commands.items()},
+        "postgres_checkouts": stats.get("postgres_pool", {}).get("checkouts", 0),
+        "redis_cache": stats.get("cache", {}).get("l2", {}),
+        "local_cache": {
+            key: stats.get("cache", {}).get("l1", {}).get(key, 0) for key in ("hits", "misses")
+        }
+    }
+
+
+def diff_counts(before, after):
+    if isinstance(after, dict):
+        return {key: diff_counts(before.get(key, 0) if isinstance(before, dict) else 0, value) for key, value in after.items()}
+    if isinstance(after, (int, float)):
+        return after - (before or 0)
+    return after
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    weights = parse_mix(args.mix)
+    run_id = uuid.uuid4().hex[:8]
+    task_counts = [int(count) for count in args.tasks_per_user.split(",")]
+
+    users = [
+        BenchUser(f"bench-{run_id}-{i}@example.com", task_counts[i % len(task_counts)])
+        for i in range(args.users)
+    ]
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        setup_started = time.perf_counter()
+        await asyncio.gather(*(setup_user(client, user) for user in users))
+        setup_seconds = time.perf_counter() - setup_started
+
+        tracker = FanoutTracker()
+        sockets = []
+        if args.clients:
+            if socketio is None:
+                print("python-socketio[asyncio_client] is not installed, skipping socket clients", file=sys.stderr)
+            else:
+                sockets = await asyncio.gather(*(
+                    connect_socket(args.base_url, users[i % len(users)], tracker)
+                    for i in range(args.clients)
+                ))
+
+        try:
+            stats_before = stats_counts((await client.get("/stats")).json())
+
+            recorder = Recorder()
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(
+                worker(deadline, client, users, weights, recorder, tracker)
+                for _ in range(args.concurrency)
+            ))
+            duration = time.perf_counter() - started
+
+            # son event'ler gelsin
+            await asyncio.sleep(1)
+            stats_after = stats_counts((await client.get("/stats")).json())
+        finally:
+            for sio in sockets:
+                await sio.disconnect()
+            await asyncio.gather(*(teardown_user(client, user) for user in users), return_exceptions=True)
+
+    names = sorted(set(recorder.samples) | set(recorder.errors))
+    total = sum(len(samples) for name, samples in recorder.samples.items() if ":" not in name)
+    return {
+        "config": {
+            "base_url": args.base_url,
+            "users": args.users,
+            "tasks_per_user": task_counts,
+            "concurrency": args.concurrency,
+            "socket_clients": len(sockets),
+            "duration": args.duration,
+            "mix": weights,
+            "seed": args.seed
+        },
+        "setup_seconds": round(setup_seconds, 3),
+        "throughput": round(total / duration, 2),
+        "operations": {
+            name: summarize(recorder.samples.get(name, []), recorder.errors.get(name, 0), duration)
+            for name in names
+        },
+        "fanout": {
+            **summarize(tracker.samples, 0, duration),
+            "events_received": tracker.received
+        },
+        "backend_queries": diff_counts(stats_before, stats_after)
+    }
+
+
+def print_table(result: dict, baseline: dict | None = None) -> None:
+    print(f"throughput: {result['throughput']} req/s")
+    print(f"{'operation':>14} {'count':>8} {'err':>5} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}" + ("  p95 vs base" if baseline else ""))
+    rows = {**result["operations"], "fanout": result["fanout"]}
+    base_rows = {**baseline["operations"], "fanout": baseline["fanout"]} if baseline else {}
+    for name, r in rows.items():
+        line = (
+            f"{name:>14} {r['count']:>8} {r['errors']:>5} {r['throughput']:>9.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+        base = base_rows.get(name)
+        if base and base["p95_ms"]:
+            line += f"  {(r['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100:+.1f}%"
+        print(line)
+    print("backend queries:", json.dumps(result["backend_queries"]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=6)
+    parser.add_argument("--tasks-per-user", default="10,1000,10000", help="comma separated, assigned round robin")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=50, help="Socket.IO clients")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON result to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare p95 against")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# /tasks/search gecikmesi task sayisi buyudukce: (user_id, search_terms) index'i vs title/description regex taramasi
+# Calisan bi MongoDB lazim (MONGODB_URI), sentetik user'in task'leri sonunda siliniyo.
+# Eslesen task sayisi sabit (--matches), sadece alakasiz task'ler artiyo; index'li arama duz kalmali.
+#
+#   cd packages/backend
+#   python benchmarks/bench_search.py
+#   python benchmarks/bench_search.py --sizes 1000,10000,50000 --queries 200 --json
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from beanie import init_beanie  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.models.task import Task  # noqa: E402
+from app.services.search_service import search_tasks  # noqa: E402
+from app.services.task_service import TASK_PROJECTION, search_fields  # noqa: E402
+
+FILLER = [
+    "call", "email", "team", "meeting", "review", "update", "docs", "deploy", "fix", "bug",
+    "plan", "sprint", "client", "invoice", "design", "write", "test", "refactor", "sync", "notes"
+]
+# sadece --matches tane task'te geciyo
+NEEDLE_TITLE = "Quarterly budget forecast"
+NEEDLE_DESCRIPTION = "prepare the spreadsheet for finance"
+QUERIES = ["quarterly", "quart", "budget fore", "spreadsheet"]
+
+
+def make_document(user_id: str, now: datetime, i: int, needle: bool) -> dict:
+    rng = random.Random(i)
+    if needle:
+        title, description = NEEDLE_TITLE, NEEDLE_DESCRIPTION
+    else:
+        title = " ".join(rng.choices(FILLER, k=4)) + f" {i}"
+        description = " ".join(rng.choices(FILLER, k=12))
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "title": title,
+        "description": description,
+        "status": "todo",
+        "created_at": now - timedelta(minutes=i),
+        "updated_at": now - timedelta(minutes=i),
+        "completed_at": None,
+        "version": 0,
+        **search_fields(title, description)
+    }
+
+
+async def grow(collection, user_id: str, start: int, end: int, matches: int) -> None:
+    # eslesenler ilk --matches task, sonrasi hep alakasiz
+    now = datetime.utcnow()
+    for batch_start in range(start, end, 1000):
+        batch = [
+            make_document(user_id, now, i, i < matches)
+            for i in range(batch_start, min(batch_start + 1000, end))
+        ]
+        await collection.insert_many(batch, ordered=False)
+
+
+async def scan_search(collection, user_id: str, q: str, limit: int) -> list[dict]:
+    # index'siz alternatif: her kelime title ya da description'da gecsin
+    conditions = [
+        {"$or": [
+            {"title": {"$regex": re.escape(word), "$options": "i"}},
+            {"description": {"$regex": re.escape(word), "$options": "i"}}
+        ]}
+        for word in q.split()
+    ]
+    return await collection.find(
+        {"user_id": user_id, "$and": conditions},
+        TASK_PROJECTION
+    ).sort("updated_at", -1).limit(limit).to_list(None)
+
+
+async def measure(func, queries: int, limit: int) -> dict:
+    latencies = []
+    found = 0
+    for i in range(queries):
+        q = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        result = await func(q, limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found = max(found, len(result))
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "max_results": found
+    }
+
+
+async def run(args) -> dict:
+    settings = get_settings()
+    client = AsyncIOMotorClient(args.uri or settings.mongodb_uri)
+    await init_beanie(database=client.get_default_database(), document_models=[Task])
+
+    user_id = f"bench-{uuid.uuid4()}"
+    collection = Task.get_motor_collection()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    async def indexed(q, limit):
+        tasks, _ = await search_tasks(user_id, q, limit)
+        return tasks
+
+    async def scan(q, limit):
+        return await scan_search(collection, user_id, q, limit)
+
+    results = []
+    current = 0
+    try:
+        for size in sizes:
+            await grow(collection, user_id, current, size, args.matches)
+            current = size
+            # isinma
+            await measure(indexed, len(QUERIES), args.limit)
+            results.append({
+                "tasks": size,
+                "index": await measure(indexed, args.queries, args.limit),
+                "scan": await measure(scan, args.queries, args.limit)
+            })
+    finally:
+        await collection.delete_many({"user_id": user_id})
+        client.close()
+
+    return {"matches": args.matches, "limit": args.limit, "queries": QUERIES, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma separated task counts")
+    parser.add_argument("--matches", type=int, default=50, help="tasks matching the queries")
+    parser.add_argument("--queries", type=int, default=200, help="queries per size and path")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--uri", help="defaults to MONGODB_URI")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"matching tasks: {results['matches']}, page size: {results['limit']}")
+    print(f"{'tasks':>8} {'index p50':>10} {'index p95':>10} {'scan p50':>10} {'scan p95':>10}")
+    for row in results["results"]:
+        print(
+            f"{row['tasks']:>8} {row['index']['p50_ms']:>10.2f} {row['index']['p95_ms']:>10.2f} "
+            f"{row['scan']['p50_ms']:>10.2f} {row['scan']['p95_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# JSON encode/decode throughput: stdlib json (eski hali) vs app.serialization
+#
+#   cd packages/backend
+#   python benchmarks/bench_serialization.py
+#   JSON_BACKEND=msgspec python benchmarks/bench_serialization.py --json
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+
+from app import serialization  # noqa: E402
+
+SIZES = [100, 1000, 10000]
+STATUSES = ["todo", "in_progress", "done"]
+
+
+def make_tasks(count: int) -> list[dict]:
+    user_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(ObjectId()),
+            "user_id": user_id,
+            "title": f"Task number {i} - follow up with the team",
+            "description": "Some longer description of the task, " * (i % 4) or None,
+            "status": STATUSES[i % 3],
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(seconds=i)
+        }
+        for i in range(count)
+    ]
+
+
+def measure(func, arg, min_seconds: float = 0.5) -> float:
+    # saniyede kac cagri
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        func(arg)
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return runs / elapsed
+
+
+def stdlib_dumps(obj):
+    return json.dumps(obj, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for size in SIZES:
+        tasks = make_tasks(size)
+        payload = {"tasks": tasks, "count": size}
+
+        encoded_stdlib = stdlib_dumps(payload)
+        encoded_fast = serialization.dumps(payload)
+
+        results.append({
+            "tasks": size,
+            "bytes": len(encoded_fast),
+            "encode_stdlib_ops": measure(stdlib_dumps, payload),
+            "encode_fast_ops": measure(serialization.dumps, payload),
+            "decode_stdlib_ops": measure(json.loads, encoded_stdlib),
+            "decode_fast_ops": measure(serialization.loads, encoded_fast)
+        })
+
+    if args.json:
+        print(json.dumps({"backend": serialization.BACKEND, "results": results}, indent=2))
+        return
+
+    print(f"backend: {serialization.BACKEND}")
+    print(f"{'tasks':>7} {'bytes':>10} {'enc stdlib/s':>13} {'enc fast/s':>11} {'x':>6} {'dec stdlib/s':>13} {'dec fast/s':>11} {'x':>6}")
+    for r in results:
+        print(
+            f"{r['tasks']:>7} {r['bytes']:>10} "
+            f"{r['encode_stdlib_ops']:>13.1f} {r['encode_fast_ops']:>11.1f} "
+            f"{r['encode_fast_ops'] / r['encode_stdlib_ops']:>6.1f} "
+            f"{r['decode_stdlib_ops']:>13.1f} {r['decode_fast_ops']:>11.1f} "
+            f"{r['decode_fast_ops'] / r['decode_stdlib_ops']:>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
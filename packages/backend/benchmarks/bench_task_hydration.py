@@ -0,0 +1,120 @@
+# Buyuk bi task listesini okumak: beanie Task hydration (eski hali) vs ham motor + projection
+# Calisan bi MongoDB lazim (MONGODB_URI), sentetik user'in task'leri sonunda siliniyo.
+#
+#   cd packages/backend
+#   python benchmarks/bench_task_hydration.py
+#   python benchmarks/bench_task_hydration.py --tasks 50000 --runs 3 --json
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from beanie import init_beanie  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.models.task import Task  # noqa: E402
+from app.services.task_service import load_task_dicts, task_to_dict  # noqa: E402
+
+STATUSES = ["todo", "in_progress", "done"]
+
+
+def make_documents(user_id: str, count: int) -> list[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "title": f"Task number {i} - follow up with the team",
+            "description": "Some longer description of the task, " * (i % 4) or None,
+            "status": STATUSES[i % 3],
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(seconds=i),
+            "version": i % 5
+        }
+        for i in range(count)
+    ]
+
+
+async def load_with_beanie(user_id: str) -> list[dict]:
+    tasks = await Task.find(Task.user_id == user_id).to_list()
+    return [task_to_dict(task) for task in tasks]
+
+
+async def measure(func, user_id: str, runs: int) -> dict:
+    # sure icin en iyi run, bellek icin ayri bi run (tracemalloc yavaslatiyo)
+    best = float("inf")
+    count = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await func(user_id)
+        best = min(best, time.perf_counter() - started)
+        count = len(result)
+        del result
+
+    tracemalloc.start()
+    result = await func(user_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {"tasks": count, "seconds": best, "peak_bytes": peak}
+
+
+async def run(args) -> dict:
+    settings = get_settings()
+    client = AsyncIOMotorClient(args.uri or settings.mongodb_uri)
+    await init_beanie(database=client.get_default_database(), document_models=[Task])
+
+    user_id = f"bench-{uuid.uuid4()}"
+    collection = Task.get_motor_collection()
+    documents = make_documents(user_id, args.tasks)
+    for start in range(0, len(documents), 1000):
+        await collection.insert_many(documents[start:start + 1000], ordered=False)
+    del documents
+
+    try:
+        beanie_result = await measure(load_with_beanie, user_id, args.runs)
+        raw_result = await measure(load_task_dicts, user_id, args.runs)
+    finally:
+        await collection.delete_many({"user_id": user_id})
+        client.close()
+
+    return {"tasks": args.tasks, "beanie": beanie_result, "projection": raw_result}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--uri", help="defaults to MONGODB_URI")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    beanie_result, raw_result = results["beanie"], results["projection"]
+    print(f"tasks: {results['tasks']}")
+    print(f"{'path':>12} {'seconds':>10} {'peak MB':>10}")
+    for name, r in (("beanie", beanie_result), ("projection", raw_result)):
+        print(f"{name:>12} {r['seconds']:>10.4f} {r['peak_bytes'] / 1024 / 1024:>10.2f}")
+    print(
+        f"speedup: {beanie_result['seconds'] / raw_result['seconds']:.1f}x, "
+        f"memory: {beanie_result['peak_bytes'] / max(raw_result['peak_bytes'], 1):.1f}x less"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,114 @@
 import { useEffect, useRef, useCallback } from "react";
 import { io, Socket } from "socket.io-client";
-import type { TaskEvent } from "../types";
+import type { TaskEvent, TaskEventBatch, TaskResumeResponse } from "../types";
 
-export function useWebSocket(onTaskEvent: (event: TaskEvent) => void) {
+// seq'te bosluk bu kadar surede kapanmazsa kacirilmis sayilip resume isteniyo
+const GAP_TIMEOUT_MS = 1000;
+
+export function useWebSocket(
+  onTaskEvent: (event: TaskEvent) => void,
+  onResync?: () => void,
+) {
   const socketRef = useRef<Socket | null>(null);
+  // araliksiz uygulanan son seq, reconnect'te kacirilanlari istemek icin
+  const lastSeqRef = useRef<number | null>(null);
+  // sirasi gelmemis event'ler: cluster'da worker'lar ayri emit ediyo, 5 4'ten once gelebilir
+  const pendingRef = useRef<Map<number, TaskEvent>>(new Map());
+  // resume cevabi gelene kadar canli event'ler uygulanmiyo, sadece bekletiliyo
+  const resumingRef = useRef(false);
+  const gapTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  // ilk baglanti mi reconnect mi
+  const disconnectedRef = useRef(false);
+
+  // checkGap'ten cagriliyo, resume de checkGap'i kullandigi icin ref uzerinden
+  const resumeRef = useRef<() => void>(() => {});
+
+  const drain = useCallback(() => {
+    const pending = pendingRef.current;
+    if (resumingRef.current || lastSeqRef.current === null) return;
+
+    let next = lastSeqRef.current + 1;
+    while (pending.has(next)) {
+      const event = pending.get(next)!;
+      pending.delete(next);
+      lastSeqRef.current = next;
+      onTaskEvent(event);
+      next += 1;
+    }
+  }, [onTaskEvent]);
+
+  const checkGap = useCallback(() => {
+    if (pendingRef.current.size === 0) {
+      if (gapTimerRef.current) {
+        clearTimeout(gapTimerRef.current);
+        gapTimerRef.current = null;
+      }
+      return;
+    }
+    if (gapTimerRef.current) return;
+
+    gapTimerRef.current = setTimeout(() => {
+      gapTimerRef.current = null;
+      if (pendingRef.current.size > 0) resumeRef.current();
+    }, GAP_TIMEOUT_MS);
+  }, []);
+
+  const resume = useCallback(() => {
+    const socket = socketRef.current;
+    if (!socket || resumingRef.current) return;
+    resumingRef.current = true;
+
+    // hic seq gormediysek 0'dan iste, arada event olduysa backend resync diyo
+    socket.emit(
+      "task:resume",
+      { lastSeq: lastSeqRef.current ?? 0 },
+      (response: TaskResumeResponse) => {
+        resumingRef.current = false;
+
+        if (response.resync) {
+          lastSeqRef.current = response.seq;
+          pendingRef.current.forEach((_, seq) => {
+            if (seq <= response.seq) pendingRef.current.delete(seq);
+          });
+          onResync?.();
+        } else {
+          if (lastSeqRef.current === null) lastSeqRef.current = 0;
+          response.events?.forEach((event) => {
+            if (event.seq !== undefined && event.seq > lastSeqRef.current!) {
+              pendingRef.current.set(event.seq, event);
+            }
+          });
+        }
+        drain();
+        checkGap();
+      },
+    );
+  }, [drain, checkGap, onResync]);
+  resumeRef.current = resume;
+
+  const handleEvent = useCallback(
+    (event: TaskEvent) => {
+      if (event.seq === undefined) {
+        // redis yazamadiysa seq'siz geliyo, sirasi bilinmiyo, direkt uygula
+        onTaskEvent(event);
+        return;
+      }
+
+      // hic seq bilmiyosak ilk gelenden basla
+      if (lastSeqRef.current === null && !resumingRef.current) {
+        lastSeqRef.current = event.seq - 1;
+      }
+      // tekrar gelen event'leri atla
+      if (lastSeqRef.current !== null && event.seq <= lastSeqRef.current) {
+        return;
+      }
+
+      pendingRef.current.set(event.seq, event);
+      drain();
+      checkGap();
+    },
+    [onTaskEvent, drain, checkGap],
+  );
 
   const connect = useCallback(() => {
     const token = localStorage.getItem("token");
@@ -20,22 +125,49 @@ export function useWebSocket(onTaskEvent: (event: TaskEvent) => void) {
 
     socketRef.current.on("connect", () => {
       console.log("ws connected");
+
+      // ilk baglantida kacirilan bisey yok, liste zaten yeni cekildi
+      if (!disconnectedRef.current) return;
+
+      // socket room'a cevaptan once giriyo, canli event'ler resume bitene kadar bekletiliyo
+      resume();
     });
 
     socketRef.current.on("disconnect", () => {
       console.log("ws disconnected");
+      disconnectedRef.current = true;
+      // cevabi hic gelmeyecek, reconnect'te yeniden istenecek
+      resumingRef.current = false;
     });
 
     socketRef.current.on("connect_error", (error) => {
       console.error("ws error:", error.message);
     });
 
+    // backend baglaninca o anki seq'i gonderiyo, hic event almasak da resume edebilelim
+    // reconnect'te alinmiyo, yoksa aradaki event'leri atlardik
+    socketRef.current.on("task:seq", (data: { seq: number }) => {
+      if (!disconnectedRef.current && lastSeqRef.current === null) {
+        lastSeqRef.current = data.seq;
+        drain();
+      }
+    });
+
     socketRef.current.on("task:update", (event: TaskEvent) => {
-      onTaskEvent(event);
+      handleEvent(event);
     });
-  }, [onTaskEvent]);
+
+    // backend kisa surede gelen event'leri tek mesajda topluyo
+    socketRef.current.on("task:batch", (batch: TaskEventBatch) => {
+      batch.events.forEach(handleEvent);
+    });
+  }, [handleEvent, resume, drain]);
 
   const disconnect = useCallback(() => {
+    if (gapTimerRef.current) {
+      clearTimeout(gapTimerRef.current);
+      gapTimerRef.current = null;
+    }
     if (socketRef.current) {
       socketRef.current.disconnect();
       socketRef.current = null;
@@ -45,14 +45,38 @@ export function Tasks() {
     }
   }, []);
 
-  const handleTaskEvent = useCallback(
-    (_: TaskEvent) => {
+  // event'ler task verisini tasiyo, listeyi yeniden cekmeden uyguluyoruz
+  const handleTaskEvent = useCallback((event: TaskEvent) => {
+    // import'ta sadece ozet geliyo, listeyi yeniden cek
+    if (event.type === "tasks.imported") {
       fetchTasks();
-    },
-    [fetchTasks],
-  );
+      return;
+    }
+
+    const incoming = event.task ? [event.task] : (event.tasks ?? []);
+
+    if (event.type === "task.deleted" || event.type === "tasks.deleted") {
+      const removed = new Set(event.taskIds ?? [event.taskId]);
+      setTasks((current) => current.filter((task) => !removed.has(task.id)));
+      return;
+    }
+
+    setTasks((current) => {
+      const next = [...current];
+      for (const task of incoming) {
+        const index = next.findIndex((item) => item.id === task.id);
+        if (index === -1) {
+          next.unshift(task);
+        } else if (task.version >= next[index].version) {
+          // eski bir event daha yeni hali ezmesin
+          next[index] = task;
+        }
+      }
+      return next;
+    });
+  }, [fetchTasks]);
 
-  useWebSocket(handleTaskEvent);
+  useWebSocket(handleTaskEvent, fetchTasks);
 
   useEffect(() => {
     fetchTasks();
@@ -12,14 +12,38 @@ export interface Task {
   status: 'todo' | 'in_progress' | 'done';
   created_at: string;
   updated_at: string;
+  completed_at?: string | null;
+  version: number;
 }
 
 export interface TaskEvent {
-  type: 'task.created' | 'task.updated' | 'task.deleted';
-  taskId: string;
+  type:
+    | 'task.created'
+    | 'task.updated'
+    | 'task.deleted'
+    | 'tasks.created'
+    | 'tasks.updated'
+    | 'tasks.deleted'
+    | 'tasks.imported';
+  taskId?: string;
+  taskIds?: string[];
+  task?: Task;
+  tasks?: Task[];
+  seq?: number;
+  count?: number;
   timestamp: number;
 }
 
+export interface TaskEventBatch {
+  events: TaskEvent[];
+}
+
+export interface TaskResumeResponse {
+  resync: boolean;
+  seq: number;
+  events?: TaskEvent[];
+}
+
 export interface LoginResponse {
   access_token: string;
   token_type: string;